@@ -3,16 +3,27 @@ from client.ensembl_client import EnsemblClient
 
 st.title("Genomics Explorer with Claude")
 
-# Initialize the client
-client = EnsemblClient()
+# Construct the client once per server process instead of on every rerun
+@st.cache_resource
+def get_client():
+    return EnsemblClient()
+
+client = get_client()
+
+# Identical questions are answered from Streamlit's cache instead of re-querying Claude
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_query(question: str) -> str:
+    return client.query(question)
+
+def answer(question: str):
+    with st.spinner("Querying Ensembl..."):
+        st.write(cached_query(question))
 
 # Create a text input for the user's question
 user_question = st.text_input("Ask a genomics question:")
 
 if st.button("Submit") and user_question:
-    with st.spinner("Claude is thinking..."):
-        response = client.query(user_question)
-    st.write(response)
+    answer(user_question)
 
 # Example questions
 st.sidebar.header("Example Questions")
@@ -26,5 +37,4 @@ examples = [
 
 for example in examples:
     if st.sidebar.button(example):
-        st.session_state.user_question = example
-        st.experimental_rerun()
\ No newline at end of file
+        answer(example)
@@ -1,20 +1,250 @@
-import anthropic
-import json
+import asyncio
+import httpx
+import orjson
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Dict, Any
 from datetime import datetime
 
-# Set your API key
-client = anthropic.Anthropic()
-                             
+from ensembl_mcp_server.schema import METHOD_SCHEMA
+
+# The anthropic SDK is heavy to import, so the clients are only built on first use
+_client = None
+_async_client = None
+
+def _get_client():
+    global _client
+    if _client is None:
+        import anthropic
+        _client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    return _client
+
+def _get_async_client():
+    # Async twin used by the FastAPI client server so Claude calls don't block the event loop
+    global _async_client
+    if _async_client is None:
+        import anthropic
+        _async_client = anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    return _async_client
+
+# Methods the MCP server dispatches, frozen once so the tool schema never rebuilds it
+_METHOD_ENUM = tuple(METHOD_SCHEMA)
+
+# Describe the MCP tool to Claude
+MCP_TOOL_DESCRIPTION = {
+    "name": "ensembl_api",
+    "description": "Access the Ensembl genomics database to retrieve information about genes, variants, sequences, and more.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "method": {
+                "type": "string",
+                "enum": _METHOD_ENUM,
+                "description": "The Ensembl API method to call"
+            },
+            "params": {
+                "type": "object",
+                "description": "Parameters for the API call"
+            }
+        },
+        "required": ["method", "params"]
+    }
+}
+
+# System prompt to instruct Claude on using the MCP tool
+SYSTEM_PROMPT = """
+You are a genomics assistant with expertise in molecular biology, genetics, and bioinformatics.
+You have access to the Ensembl API through a Model Context Protocol tool.
+When answering questions, you should:
+1. Consider if you need to retrieve data from the Ensembl database
+2. If so, call the appropriate method with the right parameters
+3. Interpret the results and provide a clear, educational response
+
+The Ensembl API supports data for many species, not just humans. Always consider which species
+the user is interested in, and specify the appropriate species parameter when making API calls.
+If the species isn't mentioned, you can assume human as the default.
+
+Available API methods:
+- lookup_gene: Get details about a gene by Ensembl ID (params: gene_id, species)
+- lookup_gene_by_symbol: Get details about a gene by gene symbol (params: symbol, species)
+- get_gene_sequence: Get the DNA sequence of a gene (params: gene_id, species)
+- get_variant_info: Get information about a genetic variant (params: variant_id, species)
+- search_genes: Search for genes matching a query (params: query, species)
+- get_sequence_by_id: Get sequence data for a given stable ID (params: id, species, mask, expand_3prime, expand_5prime)
+- get_sequence_by_region: Get genomic sequence for a specific region (params: region, species)
+- lookup_genes_batch: Get details about several genes at once by Ensembl ID (params: ids, species)
+- get_sequences_batch: Get sequences for several stable IDs at once (params: ids, species)
+- get_gene_tree: Get a gene tree for a gene tree stable identifier (params: id)
+- get_homology: Get homology (ortholog) information for a gene (params: id, species)
+- get_genomic_alignment: Get genomic alignments for a region (params: region, species)
+- get_variant_consequences: Get variant consequences using VEP (params: variant_id, species)
+- get_phenotype_by_gene: Get phenotype annotations for a gene (params: gene, species)
+- get_phenotype_by_region: Get phenotype annotations in a region (params: region, species)
+- get_xrefs_by_symbol: Get cross-references by gene symbol (params: symbol, species)
+- get_xrefs_by_id: Get cross-references by Ensembl ID (params: id)
+- get_species_info: Get information about available species
+- get_assembly_info: Get genome assembly information for a species (params: species)
+
+When a question needs several independent lookups, issue the tool calls in parallel
+in a single response instead of one after another. When you need the same lookup for
+several Ensembl IDs, prefer lookup_genes_batch or get_sequences_batch over repeated calls.
+
+Be precise, clear, and educational in your responses.
+"""
+
+# Static system prompt and tool schema, marked as cacheable so Anthropic's
+# prompt cache serves them on the initial and follow-up calls
+_SYSTEM_BLOCKS = [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
+_TOOLS = [{**MCP_TOOL_DESCRIPTION, "cache_control": {"type": "ephemeral"}}]
+
+
+def _tool_result_messages(question, tool_uses, tool_responses):
+    """Build the follow-up conversation that hands every tool result back to Claude."""
+    return [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": [
+            {
+                "type": "tool_use",
+                "id": tool_use.id,
+                "name": "ensembl_api",
+                "input": tool_use.input
+            }
+            for tool_use in tool_uses
+        ]},
+        {"role": "user", "content": [
+            {
+                "type": "tool_result",
+                "tool_use_id": tool_use.id,
+                "content": tool_response
+            }
+            for tool_use, tool_response in zip(tool_uses, tool_responses)
+        ]}
+    ]
+
+
+# Debug logs can hold megabytes of Ensembl JSON; serialize and write them off the request path
+_DEBUG_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+
+def _write_debug(session_id, debug_log):
+    path = Path(f"debug_{session_id}.json")
+    path.write_bytes(orjson.dumps(debug_log, option=orjson.OPT_INDENT_2))
+    print(f"Debug info saved to {path}")
+
+
+def _save_debug(session_id, debug_log):
+    _DEBUG_EXECUTOR.submit(_write_debug, session_id, debug_log)
+
 
 class EnsemblClient:
     def __init__(self, mcp_server_url="http://localhost:8000/mcp/ensembl", debug=False):
         self.mcp_server_url = mcp_server_url
         self.debug = debug
         self.api_key = os.environ.get("ANTHROPIC_API_KEY")  # Get the API key from environment variables
+        self._http = None
         
+    def _post_mcp(self, mcp_request):
+        # Add the API key to the headers
+        headers = {
+            "Content-Type": "application/json",
+            "x-api-key": self.api_key  # Include the API key in the request
+        }
+
+        mcp_response = requests.post(
+            self.mcp_server_url,
+            json=mcp_request,
+            headers=headers
+        )
+
+        # Check if the request was successful
+        mcp_response.raise_for_status()
+        return orjson.loads(mcp_response.content)
+
+    async def _apost_mcp(self, mcp_request):
+        # Lazily created so the pool belongs to the event loop that first uses it
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                headers={"Content-Type": "application/json", "x-api-key": self.api_key},
+                timeout=60,
+            )
+        mcp_response = await self._http.post(self.mcp_server_url, json=mcp_request)
+        mcp_response.raise_for_status()
+        return orjson.loads(mcp_response.content)
+
+    @staticmethod
+    def _mcp_requests(tool_uses):
+        mcp_requests = []
+        for tool_use in tool_uses:
+            method = tool_use.input.get('method')
+            params = tool_use.input.get('params', {})
+            print(f"Tool call: {method} with params: {params}")
+            mcp_requests.append({"method": method, "params": params})
+        return mcp_requests
+
+    def _call_tools(self, tool_uses):
+        """Run every tool call Claude emitted concurrently and return the results in order."""
+        mcp_requests = self._mcp_requests(tool_uses)
+        if len(mcp_requests) == 1:
+            return [self._post_mcp(mcp_requests[0])]
+        with ThreadPoolExecutor(max_workers=len(mcp_requests)) as executor:
+            return list(executor.map(self._post_mcp, mcp_requests))
+
+    async def _acall_tools(self, tool_uses):
+        """Async counterpart of _call_tools: the MCP posts are gathered on the event loop."""
+        mcp_requests = self._mcp_requests(tool_uses)
+        return await asyncio.gather(*(self._apost_mcp(r) for r in mcp_requests))
+
+    def stream_query(self, question: str):
+        """Yield Claude's answer as text chunks while it is being generated."""
+        print(f"Streaming Claude: {question}")
+        with _get_client().messages.stream(
+            model="claude-3-5-sonnet-20240620",
+            max_tokens=1024,
+            system=_SYSTEM_BLOCKS,
+            messages=[{"role": "user", "content": question}],
+            tools=_TOOLS
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+            # The SDK accumulates the streamed tool input JSON for us
+            response = stream.get_final_message()
+
+        tool_uses = [c for c in response.content if c.type == 'tool_use']
+        if not tool_uses:
+            return
+
+        try:
+            mcp_results = self._call_tools(tool_uses)
+        except requests.exceptions.RequestException as e:
+            yield f"\n\nError communicating with the Ensembl MCP server: {str(e)}"
+            return
+
+        yield "\n\n"
+        with _get_client().messages.stream(
+            model="claude-3-5-sonnet-20240620",
+            max_tokens=1024,
+            system=_SYSTEM_BLOCKS,
+            tools=_TOOLS,
+            messages=_tool_result_messages(question, tool_uses, [orjson.dumps(r).decode() for r in mcp_results])
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+
+    def _result(self, session_id, debug_log, text):
+        """Saves the debug log and formats the answer; shared by query() and aquery()."""
+        if not self.debug:
+            return text
+        _save_debug(session_id, debug_log)
+        if "tool_calls" not in debug_log:
+            return f"{text}\n\n[DEBUG] No API call made"
+        calls = ", ".join(
+            f"{call['method']} (species: {call['params'].get('species', 'human')})"
+            for call in debug_log["tool_calls"]
+        )
+        return f"{text}\n\n[DEBUG] API methods: {calls}"
+
     def query(self, question: str) -> str:
         # Start a new debug session
         session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -23,209 +253,133 @@ class EnsemblClient:
             "timestamp": datetime.now().isoformat()
         }
         
-        # Describe the MCP tool to Claude
-        mcp_tool_description = {
-            "name": "ensembl_api",
-            "description": "Access the Ensembl genomics database to retrieve information about genes, variants, sequences, and more.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "method": {
-                        "type": "string",
-                        "enum": [
-                            # Current methods
-                            "lookup_gene", 
-                            "lookup_gene_by_symbol", 
-                            "get_gene_sequence",
-                            "get_variant_info", 
-                            "search_genes",
-                            
-                            # New methods
-                            "get_sequence_by_id",
-                            "get_sequence_by_region",
-                            "get_gene_tree",
-                            "get_homology",
-                            "get_genomic_alignment",
-                            "get_variant_consequences",
-                            "get_phenotype_by_gene",
-                            "get_phenotype_by_region",
-                            "get_xrefs_by_symbol",
-                            "get_xrefs_by_id",
-                            "get_species_info",
-                            "get_assembly_info"
-                        ],
-                        "description": "The Ensembl API method to call"
-                    },
-                    "params": {
-                        "type": "object",
-                        "description": "Parameters for the API call"
-                    }
-                },
-                "required": ["method", "params"]
-            }
-        }
-
-        # System prompt to instruct Claude on using the MCP tool
-        system_prompt = """
-        You are a genomics assistant with expertise in molecular biology, genetics, and bioinformatics.
-        You have access to the Ensembl API through a Model Context Protocol tool.
-        When answering questions, you should:
-        1. Consider if you need to retrieve data from the Ensembl database
-        2. If so, call the appropriate method with the right parameters
-        3. Interpret the results and provide a clear, educational response
-        
-        The Ensembl API supports data for many species, not just humans. Always consider which species
-        the user is interested in, and specify the appropriate species parameter when making API calls.
-        If the species isn't mentioned, you can assume human as the default.
-        
-        Available API methods:
-        - lookup_gene: Get details about a gene by Ensembl ID (params: gene_id, species)
-        - lookup_gene_by_symbol: Get details about a gene by gene symbol (params: symbol, species)
-        - get_gene_sequence: Get the DNA sequence of a gene (params: gene_id, species)
-        - get_variant_info: Get information about a genetic variant (params: variant_id, species)
-        - search_genes: Search for genes matching a query (params: query, species)
-        - get_sequence_by_id: Get sequence data for a given stable ID (params: id, species, mask, expand_3prime, expand_5prime)
-        - get_sequence_by_region: Get genomic sequence for a specific region (params: region, species)
-        - get_gene_tree: Get a gene tree for a gene tree stable identifier (params: id)
-        - get_homology: Get homology (ortholog) information for a gene (params: id, species)
-        - get_genomic_alignment: Get genomic alignments for a region (params: region, species)
-        - get_variant_consequences: Get variant consequences using VEP (params: variant_id, species)
-        - get_phenotype_by_gene: Get phenotype annotations for a gene (params: gene, species)
-        - get_phenotype_by_region: Get phenotype annotations in a region (params: region, species)
-        - get_xrefs_by_symbol: Get cross-references by gene symbol (params: symbol, species)
-        - get_xrefs_by_id: Get cross-references by Ensembl ID (params: id)
-        - get_species_info: Get information about available species
-        - get_assembly_info: Get genome assembly information for a species (params: species)
-        
-        Be precise, clear, and educational in your responses.
-        """
-        
         # Make the request to Claude
         print(f"Querying Claude: {question}")
-        response = client.messages.create(
+        response = _get_client().messages.create(
             model="claude-3-5-sonnet-20240620",
             max_tokens=1024,
-            system=system_prompt,
+            system=_SYSTEM_BLOCKS,
             messages=[{"role": "user", "content": question}],
-            tools=[mcp_tool_description]
+            tools=_TOOLS
         )
+        debug_log["usage"] = {
+            "cache_creation_input_tokens": response.usage.cache_creation_input_tokens,
+            "cache_read_input_tokens": response.usage.cache_read_input_tokens
+        }
         
-        # Find text and tool use in the response
-        text_content = None
-        tool_use_content = None
-        
-        for content_item in response.content:
-            if content_item.type == 'text':
-                text_content = content_item.text
-                debug_log["claude_text"] = text_content
-            elif content_item.type == 'tool_use':
-                tool_use_content = content_item
+        # Find text and tool uses in the response
+        text_content = next((c.text for c in response.content if c.type == 'text'), None)
+        tool_uses = [c for c in response.content if c.type == 'tool_use']
+        if text_content is not None:
+            debug_log["claude_text"] = text_content
         
-        # If we found a tool use, process it
-        if tool_use_content:
-            # Extract the tool use parameters
-            input_data = tool_use_content.input
-            method = input_data.get('method')
-            params = input_data.get('params', {})
-            
-            debug_log["tool_call"] = {
-                "method": method,
-                "params": params
-            }
-            # import pdb
-            # pdb.set_trace()
-            print(f"Tool call: {method} with params: {params}")
-            
-            # Make the actual API call to the MCP server
-            mcp_request = {
-                "method": method,
-                "params": params
-            }
+        # If we found tool uses, process them
+        if tool_uses:
+            debug_log["tool_calls"] = [
+                {
+                    "method": tool_use.input.get('method'),
+                    "params": tool_use.input.get('params', {})
+                }
+                for tool_use in tool_uses
+            ]
             
             try:
-                # Add the API key to the headers
-                headers = {
-                    "Content-Type": "application/json",
-                    "x-api-key": self.api_key  # Include the API key in the request
-                }
+                # Independent tool calls are sent to the MCP server in parallel
+                mcp_results = self._call_tools(tool_uses)
                 
-                mcp_response = requests.post(
-                    self.mcp_server_url,
-                    json=mcp_request,
-                    headers=headers
-                )
-                
-                # Check if the request was successful
-                mcp_response.raise_for_status()
-                mcp_result = mcp_response.json()
-                
-                debug_log["ensembl_response"] = mcp_result
-                print(f"Ensembl response received")
-                # import pdb
-                # pdb.set_trace()
-                # Pass the result back to Claude for interpretation
-                tool_response = json.dumps(mcp_result)
+                debug_log["ensembl_responses"] = mcp_results
+                print(f"Ensembl responses received")
+                # Pass the results back to Claude for interpretation
+                tool_responses = [orjson.dumps(mcp_result).decode() for mcp_result in mcp_results]
                 
                 # Create a message with the tool results
-                final_response = client.messages.create(
+                final_response = _get_client().messages.create(
                     model="claude-3-5-sonnet-20240620",
                     max_tokens=1024,
-                    system=system_prompt,
-                    messages=[
-                        {"role": "user", "content": question},
-                        {"role": "assistant", "content": [
-                            {
-                                "type": "tool_use",
-                                "id": tool_use_content.id,
-                                "name": "ensembl_api",
-                                "input": input_data
-                            }
-                        ]},
-                        {"role": "user", "content": [
-                            {
-                                "type": "tool_result",
-                                "tool_use_id": tool_use_content.id,
-                                "content": tool_response
-                            }
-                        ]}
-                    ]
+                    system=_SYSTEM_BLOCKS,
+                    tools=_TOOLS,
+                    messages=_tool_result_messages(question, tool_uses, tool_responses)
                 )
 
                 # Get Claude's final response
-                final_text = None
-                for content in final_response.content:
-                    if content.type == 'text':
-                        final_text = content.text
-                        debug_log["claude_final_response"] = final_text
-                        break
+                final_text = next((c.text for c in final_response.content if c.type == 'text'), None)
+                debug_log["claude_final_response"] = final_text
                 
                 # Save debug info if debug is enabled
-                if self.debug:
-                    with open(f"debug_{session_id}.json", "w") as f:
-                        json.dump(debug_log, f, indent=2)
-                    
-                    print(f"Debug info saved to debug_{session_id}.json")
-                    return f"{final_text}\n\n[DEBUG] API method: {method}, species: {params.get('species', 'human')}"
-                else:
-                    return final_text
+                return self._result(session_id, debug_log, final_text)
                 
             except requests.exceptions.RequestException as e:
                 error_msg = f"Error communicating with the Ensembl MCP server: {str(e)}"
                 debug_log["error"] = error_msg
                 
                 if self.debug:
-                    with open(f"debug_{session_id}.json", "w") as f:
-                        json.dump(debug_log, f, indent=2)
+                    _save_debug(session_id, debug_log)
                 
                 return error_msg
         
         # If no tool use was found, return the original response text
         if text_content:
-            if self.debug:
-                with open(f"debug_{session_id}.json", "w") as f:
-                    json.dump(debug_log, f, indent=2)
-                return f"{text_content}\n\n[DEBUG] No API call made"
-            else:
-                return text_content
+            return self._result(session_id, debug_log, text_content)
                 
-        return "No response generated"
\ No newline at end of file
+        return "No response generated"
+
+    async def aquery(self, question: str) -> str:
+        """Async version of query() for use inside an event loop (e.g. the FastAPI client server)."""
+        session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        debug_log = {
+            "question": question,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        print(f"Querying Claude: {question}")
+        response = await _get_async_client().messages.create(
+            model="claude-3-5-sonnet-20240620",
+            max_tokens=1024,
+            system=_SYSTEM_BLOCKS,
+            messages=[{"role": "user", "content": question}],
+            tools=_TOOLS
+        )
+        debug_log["usage"] = {
+            "cache_creation_input_tokens": response.usage.cache_creation_input_tokens,
+            "cache_read_input_tokens": response.usage.cache_read_input_tokens
+        }
+
+        text_content = next((c.text for c in response.content if c.type == 'text'), None)
+        tool_uses = [c for c in response.content if c.type == 'tool_use']
+        if text_content is not None:
+            debug_log["claude_text"] = text_content
+
+        if not tool_uses:
+            if text_content:
+                return self._result(session_id, debug_log, text_content)
+            return "No response generated"
+
+        debug_log["tool_calls"] = [
+            {
+                "method": tool_use.input.get('method'),
+                "params": tool_use.input.get('params', {})
+            }
+            for tool_use in tool_uses
+        ]
+        try:
+            mcp_results = await self._acall_tools(tool_uses)
+        except httpx.HTTPError as e:
+            error_msg = f"Error communicating with the Ensembl MCP server: {str(e)}"
+            debug_log["error"] = error_msg
+            if self.debug:
+                _save_debug(session_id, debug_log)
+            return error_msg
+
+        debug_log["ensembl_responses"] = mcp_results
+        tool_responses = [orjson.dumps(mcp_result).decode() for mcp_result in mcp_results]
+        final_response = await _get_async_client().messages.create(
+            model="claude-3-5-sonnet-20240620",
+            max_tokens=1024,
+            system=_SYSTEM_BLOCKS,
+            tools=_TOOLS,
+            messages=_tool_result_messages(question, tool_uses, tool_responses)
+        )
+        final_text = next((c.text for c in final_response.content if c.type == 'text'), None)
+        debug_log["claude_final_response"] = final_text
+
+        return self._result(session_id, debug_log, final_text)
@@ -1,16 +1,31 @@
 #!/usr/bin/env python3
+import argparse
 from dotenv import load_dotenv
 import os
 # Load .env BEFORE importing anything else
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), 'ensembl_mcp_server', '.env'))
-print("ANTHROPIC_API_KEY loaded:", os.getenv("ANTHROPIC_API_KEY"))
 
 from client.ensembl_client import EnsemblClient
 
-def main():
-    # Create the client
-    client = EnsemblClient()
-    
+# Example genomics questions
+EXAMPLE_QUESTIONS = [
+    "What is the function of the BRCA1 gene?",
+    "What are the known variants in the CFTR gene associated with cystic fibrosis?",
+    "Where is the TP53 gene located in the human genome?",
+    "What is the protein sequence of PSEN1?",
+    "Which genes are involved in Alzheimer's disease?"
+]
+
+def run_examples(client):
+    # Test each question
+    for question in EXAMPLE_QUESTIONS:
+        print(f"\nQuestion: {question}")
+        print("-" * 80)
+        response = client.query(question)
+        print(f"Response: {response}")
+        print("=" * 80)
+
+def run_interactive(client):
     print("Ensembl Genomics Assistant")
     print("==========================")
     print("Ask questions about genes, variants, and genomics.")
@@ -40,5 +55,21 @@ def main():
     
     print("\nGoodbye!")
 
+def main():
+    parser = argparse.ArgumentParser(description="Ask Claude genomics questions backed by Ensembl.")
+    parser.add_argument("--examples", action="store_true", help="Run the built-in example questions and exit")
+    parser.add_argument("--debug", action="store_true", help="Write a debug_<timestamp>.json log for every query")
+    args = parser.parse_args()
+
+    print("ANTHROPIC_API_KEY loaded:", bool(os.getenv("ANTHROPIC_API_KEY")))
+
+    # Create the client
+    client = EnsemblClient(debug=args.debug)
+    
+    if args.examples:
+        run_examples(client)
+    else:
+        run_interactive(client)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
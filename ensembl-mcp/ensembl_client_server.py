@@ -1,7 +1,10 @@
 from fastapi import FastAPI, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Any, Optional
+from contextlib import asynccontextmanager
+import anyio
 import os
 from dotenv import load_dotenv
 
@@ -12,7 +15,15 @@ load_dotenv(
 
 from client.ensembl_client import EnsemblClient
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # /chat/stream iterates the blocking Claude stream in worker threads; the default
+    # limit of 40 threads would cap how many slow generations can overlap
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 100
+    yield
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Or specify your frontend's URL
@@ -35,12 +46,20 @@ class ChatResponse(BaseModel):
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest = Body(...)):
     try:
-        answer = ensemble_client.query(request.query)
+        answer = await ensemble_client.aquery(request.query)
         return ChatResponse(result=answer)
     except Exception as e:
         return ChatResponse(result=None, error=str(e))
 
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest = Body(...)):
+    # Tokens are forwarded as Claude generates them; the sync generator runs in the threadpool
+    return StreamingResponse(
+        ensemble_client.stream_query(request.query), media_type="text/plain"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
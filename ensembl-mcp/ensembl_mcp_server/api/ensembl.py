@@ -1,41 +1,151 @@
-import requests
-import json
+import asyncio
+import httpx
+import orjson
+from functools import wraps
+from cachetools import TTLCache
+
+def cached(ttl=86400):
+    """Serve repeated calls from a per-method TTL cache, keyed on (args, kwargs).
+
+    Release metadata (species, assemblies, trees, xrefs) changes only with quarterly
+    Ensembl releases and keeps the default one-day TTL; gene and sequence lookups use
+    ttl=3600 and are refreshed hourly.
+    """
+    def decorator(method):
+        @wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            cache = self._caches.get(method.__name__)
+            if cache is None:
+                cache = self._caches[method.__name__] = TTLCache(maxsize=10_000, ttl=ttl)
+            key = (args, tuple(sorted(kwargs.items())))
+            try:
+                return cache[key]
+            except KeyError:
+                pass
+            result = await method(self, *args, **kwargs)
+            # Only successful payloads are cached so transient Ensembl errors are retried
+            if not (isinstance(result, dict) and "error" in result):
+                cache[key] = result
+            return result
+        return wrapper
+    return decorator
+
+class MicroBatcher:
+    """Coalesce single-ID requests arriving within a short window into one bulk call.
+
+    `fetch_many` takes a list of IDs and returns a dict keyed by ID (or an error dict).
+    """
+    def __init__(self, fetch_many, window=0.005, max_size=1000):
+        self.fetch_many = fetch_many
+        self.window = window
+        self.max_size = max_size
+        self._pending = []
+        self._timer = None
+        # The loop only holds weak references to tasks; keep in-flight dispatches alive
+        self._tasks = set()
+
+    def submit(self, id):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((id, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._dispatch(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, pending):
+        try:
+            results = await self.fetch_many(list(dict.fromkeys(id for id, _ in pending)))
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for id, future in pending:
+            if future.done():
+                continue
+            if "error" in results and id not in results:
+                future.set_result(results)
+            elif results.get(id) is None:
+                future.set_result({"error": f"ID '{id}' not found"})
+            else:
+                future.set_result(results[id])
 
 class EnsemblAPI:
     def __init__(self):
         self.base_url = "https://rest.ensembl.org"
-        self.headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        # Sequence payloads compress ~4x; httpx decodes br transparently when brotli is installed
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, br",
+        }
 
-    def lookup_gene(self, gene_id, species):
-        endpoint = f"{self.base_url}/lookup/id/{gene_id}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+        # One shared async client: concurrent calls are multiplexed over a single HTTP/2 connection
+        limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            transport=httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=3),
+            timeout=30,
+        )
+        # Method name -> TTLCache; sized and timed per endpoint by @cached
+        self._caches = {}
+        # Single-ID lookups issued within 5ms of each other share one POST /lookup/id
+        self._lookup_batcher = MicroBatcher(self.lookup_genes_batch)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def _request(self, method, path, **kwargs):
+        response = await self.client.request(method, f"{self.base_url}{path}", **kwargs)
+        if response.status_code == 429:
+            # Ensembl's rate limiter says how long to back off; retry once rather than
+            # handing Claude an error and wasting the turn
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+            response = await self.client.request(method, f"{self.base_url}{path}", **kwargs)
+        return orjson.loads(response.content) if response.is_success else {"error": response.text}
+
+    async def _get(self, path, params=None):
+        return await self._request("GET", path, params=params)
+
+    async def _post(self, path, json):
+        return await self._request("POST", path, json=json)
+
+    @cached(ttl=3600)
+    async def lookup_gene(self, gene_id, species):
+        return await self._lookup_batcher.submit(gene_id)
         
-    def lookup_gene_by_symbol(self, symbol, species):
-        endpoint = f"{self.base_url}/lookup/symbol/{species}/{symbol}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached(ttl=3600)
+    async def lookup_gene_by_symbol(self, symbol, species):
+        return await self._get(f"/lookup/symbol/{species}/{symbol}")
         
-    def get_gene_sequence(self, gene_id):
-        endpoint = f"{self.base_url}/sequence/id/{gene_id}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached(ttl=3600)
+    async def get_gene_sequence(self, gene_id):
+        return await self._get(f"/sequence/id/{gene_id}")
         
-    def get_variant_info(self, variant_id, species):
-        endpoint = f"{self.base_url}/variation/{species}/{variant_id}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached()
+    async def get_variant_info(self, variant_id, species):
+        return await self._get(f"/variation/{species}/{variant_id}")
         
-    def search_genes(self, query, species):
-        endpoint = f"{self.base_url}/xrefs/symbol/{species}/{query}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached()
+    async def search_genes(self, query, species):
+        return await self._get(f"/xrefs/symbol/{species}/{query}")
     
     # New methods to align with MCP implementation
     
     # Sequences
-    def get_sequence_by_id(self, id, species, mask=None, expand_3prime=None, expand_5prime=None):
-        endpoint = f"{self.base_url}/sequence/id/{id}"
+    @cached(ttl=3600)
+    async def get_sequence_by_id(self, id, species, mask=None, expand_3prime=None, expand_5prime=None):
         query_params = {}
         
         if mask:
@@ -44,65 +154,84 @@ class EnsemblAPI:
             query_params["expand_3prime"] = expand_3prime
         if expand_5prime:
             query_params["expand_5prime"] = expand_5prime
-            
-        response = requests.get(endpoint, params=query_params, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+
+        return await self._get(f"/sequence/id/{id}", params=query_params)
+    
+    @cached(ttl=3600)
+    async def get_sequence_by_region(self, region, species):
+        return await self._get(f"/sequence/region/{species}/{region}")
     
-    def get_sequence_by_region(self, region, species):
-        endpoint = f"{self.base_url}/sequence/region/{species}/{region}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    # FASTA streaming: these return the open upstream response so its body can be
+    # relayed chunk by chunk; the caller must aclose() it
+    async def _open_fasta(self, path, params=None):
+        request = self.client.build_request(
+            "GET", f"{self.base_url}{path}", params=params, headers={"Accept": "text/x-fasta"}
+        )
+        return await self.client.send(request, stream=True)
+
+    async def fasta_sequence_by_id(self, id, species, mask=None, expand_3prime=None, expand_5prime=None):
+        query_params = {}
+        
+        if mask:
+            query_params["mask"] = mask
+        if expand_3prime:
+            query_params["expand_3prime"] = expand_3prime
+        if expand_5prime:
+            query_params["expand_5prime"] = expand_5prime
+
+        return await self._open_fasta(f"/sequence/id/{id}", params=query_params)
+
+    async def fasta_sequence_by_region(self, region, species):
+        return await self._open_fasta(f"/sequence/region/{species}/{region}")
+    
+    # Batch lookups: one POST resolves up to 1000 IDs in a single round-trip.
+    # Results are keyed by ID; unknown IDs map to None.
+    async def lookup_genes_batch(self, ids, species=None):
+        return await self._post("/lookup/id", json={"ids": list(ids)})
+
+    async def get_sequences_batch(self, ids, species=None):
+        return await self._post("/sequence/id", json={"ids": list(ids)})
     
     # Comparative genomics
-    def get_gene_tree(self, id):
-        endpoint = f"{self.base_url}/genetree/id/{id}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached()
+    async def get_gene_tree(self, id):
+        return await self._get(f"/genetree/id/{id}")
     
-    def get_homology(self, id, species):
-        endpoint = f"{self.base_url}/homology/id/{species}/{id}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached()
+    async def get_homology(self, id, species):
+        return await self._get(f"/homology/id/{species}/{id}")
     
-    def get_genomic_alignment(self, region, species):
-        endpoint = f"{self.base_url}/alignment/region/{species}/{region}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached()
+    async def get_genomic_alignment(self, region, species):
+        return await self._get(f"/alignment/region/{species}/{region}")
     
     # Variants and phenotypes
-    def get_variant_consequences(self, variant_id, species):
-        endpoint = f"{self.base_url}/vep/{species}/id/{variant_id}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached()
+    async def get_variant_consequences(self, variant_id, species):
+        return await self._get(f"/vep/{species}/id/{variant_id}")
     
-    def get_phenotype_by_gene(self, gene, species):
-        endpoint = f"{self.base_url}/phenotype/gene/{species}/{gene}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached()
+    async def get_phenotype_by_gene(self, gene, species):
+        return await self._get(f"/phenotype/gene/{species}/{gene}")
     
-    def get_phenotype_by_region(self, region, species):
-        endpoint = f"{self.base_url}/phenotype/region/{species}/{region}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached()
+    async def get_phenotype_by_region(self, region, species):
+        return await self._get(f"/phenotype/region/{species}/{region}")
     
     # Cross references
-    def get_xrefs_by_symbol(self, symbol, species):
-        endpoint = f"{self.base_url}/xrefs/symbol/{species}/{symbol}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached()
+    async def get_xrefs_by_symbol(self, symbol, species):
+        return await self._get(f"/xrefs/symbol/{species}/{symbol}")
     
-    def get_xrefs_by_id(self, id):
-        endpoint = f"{self.base_url}/xrefs/id/{id}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached()
+    async def get_xrefs_by_id(self, id):
+        return await self._get(f"/xrefs/id/{id}")
     
     # Information
-    def get_species_info(self):
-        endpoint = f"{self.base_url}/info/species"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
+    @cached()
+    async def get_species_info(self):
+        return await self._get("/info/species")
     
-    def get_assembly_info(self, species):
-        endpoint = f"{self.base_url}/info/assembly/{species}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json() if response.ok else {"error": response.text}
\ No newline at end of file
+    @cached()
+    async def get_assembly_info(self, species):
+        return await self._get(f"/info/assembly/{species}")
\ No newline at end of file
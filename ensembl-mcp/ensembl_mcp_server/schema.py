@@ -0,0 +1,35 @@
+# MCP method name -> required params. The server's dispatch table and the Claude
+# tool's method enum are both derived from this, so they cannot drift apart.
+METHOD_SCHEMA = {
+    "lookup_gene": ("gene_id", "species"),
+    "lookup_gene_by_symbol": ("symbol", "species"),
+    "get_gene_sequence": ("gene_id",),
+    "get_variant_info": ("variant_id", "species"),
+    "search_genes": ("query", "species"),
+
+    # Sequences
+    "get_sequence_by_id": ("id", "species"),
+    "get_sequence_by_region": ("region", "species"),
+
+    # Batch lookups
+    "lookup_genes_batch": ("ids",),
+    "get_sequences_batch": ("ids",),
+
+    # Comparative genomics
+    "get_gene_tree": ("id",),
+    "get_homology": ("id", "species"),
+    "get_genomic_alignment": ("region", "species"),
+
+    # Variants and phenotypes
+    "get_variant_consequences": ("variant_id", "species"),
+    "get_phenotype_by_gene": ("gene", "species"),
+    "get_phenotype_by_region": ("region", "species"),
+
+    # Cross references
+    "get_xrefs_by_symbol": ("symbol", "species"),
+    "get_xrefs_by_id": ("id",),
+
+    # Information
+    "get_species_info": (),
+    "get_assembly_info": ("species",),
+}
@@ -1,7 +1,17 @@
 from fastapi import FastAPI, HTTPException, Body, Request, status, Depends
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from starlette.background import BackgroundTask
+from typing import Dict, Any, List, Optional
+from contextlib import asynccontextmanager
 from .api.ensembl import EnsemblAPI
+from .schema import METHOD_SCHEMA
+import asyncio
+import hmac
+import httpx
+import inspect
+import orjson
 import os
 from dotenv import load_dotenv
 
@@ -10,16 +20,44 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
 API_KEY = os.getenv('ANTHROPIC_API_KEY')
 if not API_KEY:
     raise RuntimeError('ANTHROPIC_API_KEY not found in .env file. Please ensure .env exists and contains ANTHROPIC_API_KEY=...')
+API_KEY_BYTES = API_KEY.encode()
 
-app = FastAPI()
 ensembl = EnsemblAPI()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The Ensembl HTTP client is shared for the whole process; close it on shutdown
+    yield
+    await ensembl.aclose()
+
 # Dependency to require API key
 async def require_api_key(request: Request):
-    key = request.headers.get('x-api-key') or request.query_params.get('api_key')
-    if key != API_KEY:
+    key = (request.headers.get('x-api-key') or request.query_params.get('api_key') or '').encode()
+    # Constant-time comparison so the key can't be recovered from response timing
+    if not hmac.compare_digest(key, API_KEY_BYTES):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid or missing API key')
 
+class ORJSONRoute(APIRoute):
+    """Route that parses JSON request bodies with orjson instead of the stdlib json module."""
+    def get_route_handler(self):
+        original = super().get_route_handler()
+
+        async def handler(request: Request):
+            body = await request.body()
+            if body:
+                try:
+                    # Starlette's Request.json() returns this cached value instead of re-parsing
+                    request._json = orjson.loads(body)
+                except orjson.JSONDecodeError:
+                    pass  # leave it to FastAPI to report the malformed body
+            return await original(request)
+
+        return handler
+
+# Every route requires the API key, so the check is wired once at app level
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse, dependencies=[Depends(require_api_key)])
+app.router.route_class = ORJSONRoute
+
 class MCPRequest(BaseModel):
     method: str
     params: Dict[str, Any]
@@ -28,155 +66,77 @@ class MCPResponse(BaseModel):
     result: Any
     error: Optional[str] = None
 
-@app.post("/mcp/ensembl")
-async def handle_mcp_request(request: MCPRequest = Body(...), api_key: None = Depends(require_api_key)):
+def _register(fn, *required):
+    # Resolve the signature once at import time so dispatch does no reflection per call
+    return fn, required, tuple(inspect.signature(fn).parameters)
+
+# Method name -> (bound API method, required params, accepted params)
+METHOD_REGISTRY = {
+    name: _register(getattr(ensembl, name), *required)
+    for name, required in METHOD_SCHEMA.items()
+}
+
+# Sequence methods that can be relayed as raw FASTA instead of parsed JSON
+FASTA_REGISTRY = {
+    "get_sequence_by_id": _register(ensembl.fasta_sequence_by_id, "id", "species"),
+    "get_sequence_by_region": _register(ensembl.fasta_sequence_by_region, "region", "species"),
+}
+
+async def dispatch(request: MCPRequest) -> Dict[str, Any]:
+    """Run one MCP request and return its {result, error} payload."""
     try:
-        # Validate required parameters for each method
-        if request.method == "lookup_gene":
-            if "gene_id" not in request.params:
-                raise ValueError("Missing required parameter: gene_id")
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.lookup_gene(request.params.get("gene_id"), request.params.get("species"))
-            
-        elif request.method == "lookup_gene_by_symbol":
-            if "symbol" not in request.params:
-                raise ValueError("Missing required parameter: symbol")
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.lookup_gene_by_symbol(request.params.get("symbol"), request.params.get("species"))
-            
-        elif request.method == "get_gene_sequence":
-            if "gene_id" not in request.params:
-                raise ValueError("Missing required parameter: gene_id")
-            result = ensembl.get_gene_sequence(request.params.get("gene_id"))
-            
-        elif request.method == "get_variant_info":
-            if "variant_id" not in request.params:
-                raise ValueError("Missing required parameter: variant_id")
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.get_variant_info(request.params.get("variant_id"), request.params.get("species"))
-            
-        elif request.method == "search_genes":
-            if "query" not in request.params:
-                raise ValueError("Missing required parameter: query")
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.search_genes(request.params.get("query"), request.params.get("species"))
-            
-        # Sequences
-        elif request.method == "get_sequence_by_id":
-            if "id" not in request.params:
-                raise ValueError("Missing required parameter: id")
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.get_sequence_by_id(
-                request.params.get("id"),
-                request.params.get("species"),
-                request.params.get("mask"),
-                request.params.get("expand_3prime"),
-                request.params.get("expand_5prime")
-            )
-            
-        elif request.method == "get_sequence_by_region":
-            if "region" not in request.params:
-                raise ValueError("Missing required parameter: region")
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.get_sequence_by_region(
-                request.params.get("region"),
-                request.params.get("species")
-            )
-            
-        # Comparative genomics
-        elif request.method == "get_gene_tree":
-            if "id" not in request.params:
-                raise ValueError("Missing required parameter: id")
-            result = ensembl.get_gene_tree(request.params.get("id"))
-            
-        elif request.method == "get_homology":
-            if "id" not in request.params:
-                raise ValueError("Missing required parameter: id")
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.get_homology(
-                request.params.get("id"),
-                request.params.get("species")
-            )
-            
-        elif request.method == "get_genomic_alignment":
-            if "region" not in request.params:
-                raise ValueError("Missing required parameter: region")
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.get_genomic_alignment(
-                request.params.get("region"),
-                request.params.get("species")
-            )
-            
-        # Variants and phenotypes
-        elif request.method == "get_variant_consequences":
-            if "variant_id" not in request.params:
-                raise ValueError("Missing required parameter: variant_id")
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.get_variant_consequences(
-                request.params.get("variant_id"),
-                request.params.get("species")
-            )
-            
-        elif request.method == "get_phenotype_by_gene":
-            if "gene" not in request.params:
-                raise ValueError("Missing required parameter: gene")
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.get_phenotype_by_gene(
-                request.params.get("gene"),
-                request.params.get("species")
-            )
-            
-        elif request.method == "get_phenotype_by_region":
-            if "region" not in request.params:
-                raise ValueError("Missing required parameter: region")
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.get_phenotype_by_region(
-                request.params.get("region"),
-                request.params.get("species")
-            )
-            
-        # Cross references
-        elif request.method == "get_xrefs_by_symbol":
-            if "symbol" not in request.params:
-                raise ValueError("Missing required parameter: symbol")
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.get_xrefs_by_symbol(
-                request.params.get("symbol"),
-                request.params.get("species")
-            )
-            
-        elif request.method == "get_xrefs_by_id":
-            if "id" not in request.params:
-                raise ValueError("Missing required parameter: id")
-            result = ensembl.get_xrefs_by_id(request.params.get("id"))
-            
-        # Information
-        elif request.method == "get_species_info":
-            result = ensembl.get_species_info()
-            
-        elif request.method == "get_assembly_info":
-            if "species" not in request.params:
-                raise ValueError("Missing required parameter: species")
-            result = ensembl.get_assembly_info(request.params.get("species"))
-            
-        else:
+        entry = METHOD_REGISTRY.get(request.method)
+        if entry is None:
             raise HTTPException(status_code=400, detail=f"Unknown method: {request.method}")
-            
-        return MCPResponse(result=result)
+        fn, required, accepted = entry
+
+        # Validate required parameters for the method
+        for name in required:
+            if name not in request.params:
+                raise ValueError(f"Missing required parameter: {name}")
+
+        result = await fn(**{name: request.params.get(name) for name in accepted})
+        return {"result": result, "error": None}
     except Exception as e:
-        return MCPResponse(result=None, error=str(e))
+        return {"result": None, "error": str(e)}
+
+# Ensembl payloads are returned as plain dicts and serialized by orjson directly;
+# MCPResponse only documents the shape in OpenAPI and is not used for validation
+@app.post("/mcp/ensembl", response_model=None, responses={200: {"model": MCPResponse}})
+async def handle_mcp_request(request: MCPRequest = Body(...)):
+    return ORJSONResponse(await dispatch(request))
+
+# Several methods in one round-trip; the Ensembl calls overlap on the shared client
+# and results come back in request order
+@app.post("/mcp/ensembl/batch", response_model=None, responses={200: {"model": List[MCPResponse]}})
+async def handle_mcp_batch(requests: List[MCPRequest] = Body(...)):
+    return ORJSONResponse(await asyncio.gather(*(dispatch(r) for r in requests)))
+
+# Multi-MB sequences are streamed through as text/x-fasta without being parsed
+# into Python objects and re-serialized
+@app.post("/mcp/ensembl/fasta", response_model=None)
+async def handle_mcp_fasta(request: MCPRequest = Body(...)):
+    entry = FASTA_REGISTRY.get(request.method)
+    if entry is None:
+        return ORJSONResponse({"result": None, "error": f"Method does not support FASTA: {request.method}"}, status_code=400)
+    fn, required, accepted = entry
+
+    for name in required:
+        if name not in request.params:
+            return ORJSONResponse({"result": None, "error": f"Missing required parameter: {name}"}, status_code=400)
+
+    try:
+        upstream = await fn(**{name: request.params.get(name) for name in accepted})
+    except httpx.HTTPError as e:
+        # Ensembl unreachable or timed out before any bytes were streamed
+        return ORJSONResponse({"result": None, "error": str(e)}, status_code=502)
+    if not upstream.is_success:
+        await upstream.aread()
+        await upstream.aclose()
+        return ORJSONResponse({"result": None, "error": upstream.text}, status_code=upstream.status_code)
+    return StreamingResponse(
+        upstream.aiter_bytes(), media_type="text/x-fasta", background=BackgroundTask(upstream.aclose)
+    )
 
 if __name__ == "__main__":
     import uvicorn
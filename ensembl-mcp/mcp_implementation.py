@@ -1,7 +1,19 @@
-import requests
+import httpx
 import json
+from cachetools import TTLCache
 from typing import Dict, Any, List, Optional
 
+# Per-method cache lifetimes in seconds; methods not listed use DEFAULT_CACHE_TTL.
+# Release metadata only changes with Ensembl releases, lookups are refreshed hourly.
+DEFAULT_CACHE_TTL = 86400
+CACHE_TTLS = {
+    "lookup_gene": 3600,
+    "lookup_gene_by_symbol": 3600,
+    "get_gene_sequence": 3600,
+    "get_sequence_by_id": 3600,
+    "get_sequence_by_region": 3600,
+}
+
 class EnsemblMCPServer:
     """
     An implementation of the Model Context Protocol server for Ensembl API
@@ -9,10 +21,16 @@ class EnsemblMCPServer:
     def __init__(self):
         self.base_url = "https://rest.ensembl.org"
         self.headers = {"Content-Type": "application/json", "Accept": "application/json"}
-        
-    def handle_request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Process an MCP request and return the result"""
-        handler_map = {
+        # Shared HTTP/2 keep-alive pool so concurrent requests overlap instead of queueing on threads
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            http2=True,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+            timeout=30,
+        )
+        self._caches = {}
+        # Built once; handle_request is then a single dict lookup per call
+        self.handler_map = {
             # Current handlers
             "lookup_gene": self._lookup_gene,
             "lookup_gene_by_symbol": self._lookup_gene_by_symbol,
@@ -42,18 +60,33 @@ class EnsemblMCPServer:
             "get_species_info": self._get_species_info,
             "get_assembly_info": self._get_assembly_info,
         }
+
+    async def aclose(self):
+        """Close the HTTP pool; call from the host app's shutdown/lifespan hook"""
+        await self.client.aclose()
         
-        if method not in handler_map:
+    async def handle_request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Process an MCP request and return the result"""
+        handler = self.handler_map.get(method)
+        if handler is None:
             return {"error": f"Unknown method: {method}"}
             
+        cache = self._caches.get(method)
+        if cache is None:
+            cache = self._caches[method] = TTLCache(maxsize=10_000, ttl=CACHE_TTLS.get(method, DEFAULT_CACHE_TTL))
+        key = json.dumps(params, sort_keys=True)
+        if key in cache:
+            return cache[key]
+            
         try:
-            result = handler_map[method](params)
-            return {"result": result}
+            result = await handler(params)
+            cache[key] = {"result": result}
+            return cache[key]
         except Exception as e:
             return {"error": str(e)}
     
     # Existing methods
-    def _lookup_gene(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _lookup_gene(self, params: Dict[str, Any]) -> Dict[str, Any]:
         gene_id = params.get("gene_id")
         species = params.get("species", "human")
         
@@ -61,14 +94,14 @@ class EnsemblMCPServer:
             raise ValueError("Missing required parameter: gene_id")
             
         endpoint = f"{self.base_url}/lookup/id/{gene_id}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
         
-    def _lookup_gene_by_symbol(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _lookup_gene_by_symbol(self, params: Dict[str, Any]) -> Dict[str, Any]:
         symbol = params.get("symbol")
         species = params.get("species", "human")
         
@@ -76,29 +109,29 @@ class EnsemblMCPServer:
             raise ValueError("Missing required parameter: symbol")
             
         endpoint = f"{self.base_url}/lookup/symbol/{species}/{symbol}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
     # Implement remaining handlers from the original list
-    def _get_gene_sequence(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_gene_sequence(self, params: Dict[str, Any]) -> Dict[str, Any]:
         gene_id = params.get("gene_id")
         
         if not gene_id:
             raise ValueError("Missing required parameter: gene_id")
             
         endpoint = f"{self.base_url}/sequence/id/{gene_id}"
-        response = requests.get(endpoint, headers={"Content-Type": "application/json", "Accept": "application/json"})
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
-    def _get_variant_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_variant_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
         variant_id = params.get("variant_id")
         species = params.get("species", "human")
         
@@ -106,14 +139,14 @@ class EnsemblMCPServer:
             raise ValueError("Missing required parameter: variant_id")
             
         endpoint = f"{self.base_url}/variation/{species}/{variant_id}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
-    def _search_genes(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _search_genes(self, params: Dict[str, Any]) -> Dict[str, Any]:
         query = params.get("query")
         species = params.get("species", "human")
         
@@ -121,9 +154,9 @@ class EnsemblMCPServer:
             raise ValueError("Missing required parameter: query")
             
         endpoint = f"{self.base_url}/xrefs/symbol/{species}/{query}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
@@ -131,7 +164,7 @@ class EnsemblMCPServer:
     # New method implementations
     
     # Sequences
-    def _get_sequence_by_id(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_sequence_by_id(self, params: Dict[str, Any]) -> Dict[str, Any]:
         id = params.get("id")
         mask = params.get("mask", None)
         expand_3prime = params.get("expand_3prime", None)
@@ -150,14 +183,14 @@ class EnsemblMCPServer:
         if expand_5prime:
             query_params["expand_5prime"] = expand_5prime
             
-        response = requests.get(endpoint, params=query_params, headers=self.headers)
+        response = await self.client.get(endpoint, params=query_params)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
-    def _get_sequence_by_region(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_sequence_by_region(self, params: Dict[str, Any]) -> Dict[str, Any]:
         species = params.get("species", "human")
         region = params.get("region")
         
@@ -165,29 +198,29 @@ class EnsemblMCPServer:
             raise ValueError("Missing required parameter: region")
             
         endpoint = f"{self.base_url}/sequence/region/{species}/{region}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
     # Comparative genomics
-    def _get_gene_tree(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_gene_tree(self, params: Dict[str, Any]) -> Dict[str, Any]:
         id = params.get("id")
         
         if not id:
             raise ValueError("Missing required parameter: id")
             
         endpoint = f"{self.base_url}/genetree/id/{id}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
-    def _get_homology(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_homology(self, params: Dict[str, Any]) -> Dict[str, Any]:
         species = params.get("species", "human")
         id = params.get("id")
         
@@ -195,14 +228,14 @@ class EnsemblMCPServer:
             raise ValueError("Missing required parameter: id")
             
         endpoint = f"{self.base_url}/homology/id/{species}/{id}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
-    def _get_genomic_alignment(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_genomic_alignment(self, params: Dict[str, Any]) -> Dict[str, Any]:
         species = params.get("species", "human")
         region = params.get("region")
         
@@ -210,15 +243,15 @@ class EnsemblMCPServer:
             raise ValueError("Missing required parameter: region")
             
         endpoint = f"{self.base_url}/alignment/region/{species}/{region}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
     # Variants and phenotypes
-    def _get_variant_consequences(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_variant_consequences(self, params: Dict[str, Any]) -> Dict[str, Any]:
         species = params.get("species", "human")
         variant_id = params.get("variant_id")
         
@@ -226,14 +259,14 @@ class EnsemblMCPServer:
             raise ValueError("Missing required parameter: variant_id")
             
         endpoint = f"{self.base_url}/vep/{species}/id/{variant_id}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
-    def _get_phenotype_by_gene(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_phenotype_by_gene(self, params: Dict[str, Any]) -> Dict[str, Any]:
         species = params.get("species", "human")
         gene = params.get("gene")
         
@@ -241,14 +274,14 @@ class EnsemblMCPServer:
             raise ValueError("Missing required parameter: gene")
             
         endpoint = f"{self.base_url}/phenotype/gene/{species}/{gene}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
-    def _get_phenotype_by_region(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_phenotype_by_region(self, params: Dict[str, Any]) -> Dict[str, Any]:
         species = params.get("species", "human")
         region = params.get("region")
         
@@ -256,15 +289,15 @@ class EnsemblMCPServer:
             raise ValueError("Missing required parameter: region")
             
         endpoint = f"{self.base_url}/phenotype/region/{species}/{region}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
     # Cross references
-    def _get_xrefs_by_symbol(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_xrefs_by_symbol(self, params: Dict[str, Any]) -> Dict[str, Any]:
         species = params.get("species", "human")
         symbol = params.get("symbol")
         
@@ -272,44 +305,44 @@ class EnsemblMCPServer:
             raise ValueError("Missing required parameter: symbol")
             
         endpoint = f"{self.base_url}/xrefs/symbol/{species}/{symbol}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
-    def _get_xrefs_by_id(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_xrefs_by_id(self, params: Dict[str, Any]) -> Dict[str, Any]:
         id = params.get("id")
         
         if not id:
             raise ValueError("Missing required parameter: id")
             
         endpoint = f"{self.base_url}/xrefs/id/{id}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
     # Information
-    def _get_species_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_species_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
         endpoint = f"{self.base_url}/info/species"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
     
-    def _get_assembly_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_assembly_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
         species = params.get("species", "human")
         
         endpoint = f"{self.base_url}/info/assembly/{species}"
-        response = requests.get(endpoint, headers=self.headers)
+        response = await self.client.get(endpoint)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"API error: {response.status_code} - {response.text}")
             
         return response.json()
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import argparse
 import uvicorn
 import os
 import sys
@@ -7,10 +8,27 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Ensembl MCP server.")
+    parser.add_argument("--dev", action="store_true", help="Single worker with auto-reload for local development")
+    args = parser.parse_args()
+
     print("Starting Ensembl MCP server...")
     print("==============================")
     print("Server will be available at: http://localhost:8000")
     print("Press CTRL+C to stop the server")
     
     # Run the FastAPI app
-    uvicorn.run("ensembl_mcp_server.server:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    if args.dev:
+        uvicorn.run("ensembl_mcp_server.server:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        # One worker per core on uvloop with the C HTTP parser; access logs are off the hot path
+        uvicorn.run(
+            "ensembl_mcp_server.server:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=os.cpu_count(),
+            loop="uvloop",
+            http="httptools",
+            access_log=False,
+            log_level="warning",
+        )
@@ -1,18 +1,45 @@
+import asyncio
 import unittest
+from unittest.mock import patch
 from ensembl_mcp_server.api.ensembl import EnsemblAPI
 
-class TestEnsemblAPI(unittest.TestCase):
+class TestEnsemblAPI(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         self.api = EnsemblAPI()
+
+    async def asyncTearDown(self):
+        await self.api.aclose()
         
-    def test_lookup_gene_by_symbol(self):
-        result = self.api.lookup_gene_by_symbol("BRCA1")
+    async def test_lookup_gene_by_symbol(self):
+        result = await self.api.lookup_gene_by_symbol("BRCA1", "human")
         self.assertIn("id", result)
         self.assertIn("display_name", result)
         
-    def test_lookup_nonexistent_gene(self):
-        result = self.api.lookup_gene_by_symbol("NONEXISTENTGENE123456789")
+    async def test_lookup_nonexistent_gene(self):
+        result = await self.api.lookup_gene_by_symbol("NONEXISTENTGENE123456789", "human")
         self.assertIn("error", result)
+
+    async def test_repeated_lookup_is_cached(self):
+        first = await self.api.lookup_gene_by_symbol("BRCA1", "human")
+        second = await self.api.lookup_gene_by_symbol("BRCA1", "human")
+        self.assertIs(first, second)
+
+    async def test_lookup_genes_batch(self):
+        ids = ["ENSG00000012048", "ENSG00000139618"]
+        result = await self.api.lookup_genes_batch(ids, "human")
+        self.assertEqual(set(result), set(ids))
+
+    async def test_concurrent_lookups_are_coalesced(self):
+        with patch.object(self.api, "_request", wraps=self.api._request) as request:
+            brca2, unknown = await asyncio.gather(
+                self.api.lookup_gene("ENSG00000139618", "human"),
+                self.api.lookup_gene("ENSG00000000000", "human"),
+            )
+        self.assertEqual(brca2["display_name"], "BRCA2")
+        self.assertIn("error", unknown)
+        request.assert_called_once_with(
+            "POST", "/lookup/id", json={"ids": ["ENSG00000139618", "ENSG00000000000"]}
+        )
         
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
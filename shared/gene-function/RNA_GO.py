@@ -1,50 +1,47 @@
-import pandas as pd
+import polars as pl
 import numpy as np
 from goatools.obo_parser import GODag
 import os
 from argparse import ArgumentParser
 
-def process_gaf(gaf_file, go_file, output_dir, output_file, verbose=False):
-    # Read the GAF file
-    gaf = pd.read_csv(
-        gaf_file,
-        sep="\t",
-        comment="!",
-        header=None,
-        engine="python"
-    )
-    
-    # Filter the dataframe to only include entries for "RNAcentral"
-    gaf_filtered = gaf[gaf[0] == "RNAcentral"][[9, 4]]
-    gaf_filtered.columns = ["RNA_description", "GO_Term"]
-
-    # Extract Ensembl IDs from RNA description using regular expressions
-    gaf_filtered['Ensemble_id'] = gaf_filtered['RNA_description'].str.extract(r"\((ENSCAF[^\)]+)\)")[0]
-    
-    # Filter rows where Ensemble_id starts with 'ENSCAF'
-    gaf_filtered = gaf_filtered[gaf_filtered['Ensemble_id'].str.startswith("ENSCAF", na=False)][['Ensemble_id', 'GO_Term']]
+ENSEMBL_ID_PATTERN = r"\((ENSCAF[^\)]+)\)"
 
+def process_gaf(gaf_file, go_file, output_dir, output_file, verbose=False):
     # Load the GO DAG (Gene Ontology DAG) for GO term descriptions and types
     go_dag = GODag(go_file)
+    go_terms = pl.DataFrame({
+        "GO_Term": list(go_dag.keys()),
+        "type": [term.namespace for term in go_dag.values()],
+        "desc": [term.name for term in go_dag.values()],
+    })
 
-    # Prepare lists for GO term type and description
-    go_type = []
-    go_desc = []
-
-    # Iterate through the GO terms in the dataframe
-    for term in gaf_filtered['GO_Term']:
-        try:
-            go_term = go_dag[term]
-            go_desc.append(go_term.name)
-            go_type.append(go_term.namespace)
-        except KeyError:
-            # If GO term is not found in the GO DAG, append None
-            go_desc.append(None)
-            go_type.append(None)
-
-    # Add the GO term type and description to the dataframe
-    gaf_filtered['type'] = go_type
-    gaf_filtered['desc'] = go_desc
+    # Lazily read the GAF; only the source, GO term and description columns are used.
+    # Filter, extract and join run in Polars' multi-threaded streaming engine, and
+    # GO terms missing from the DAG get null type and description.
+    gaf_filtered = (
+        pl.scan_csv(
+            gaf_file,
+            separator="\t",
+            comment_prefix="!",
+            has_header=False,
+            quote_char=None,
+            infer_schema_length=0,
+            truncate_ragged_lines=True,
+        )
+        .select(
+            pl.col("column_1").alias("src"),
+            pl.col("column_5").alias("GO_Term"),
+            pl.col("column_10").alias("RNA_description"),
+        )
+        # Filter to only include entries for "RNAcentral"
+        .filter(pl.col("src") == "RNAcentral")
+        # Extract Ensembl IDs from RNA description; rows without a match are dropped
+        .with_columns(pl.col("RNA_description").str.extract(ENSEMBL_ID_PATTERN, 1).alias("Ensemble_id"))
+        .drop_nulls("Ensemble_id")
+        .join(go_terms.lazy(), on="GO_Term", how="left")
+        .select("Ensemble_id", "GO_Term", "type", "desc")
+        .collect(streaming=True)
+    )
 
     # Ensure the output directory exists
     if not os.path.exists(output_dir):
@@ -52,7 +49,7 @@ def process_gaf(gaf_file, go_file, output_dir, output_file, verbose=False):
 
     # Write the filtered dataframe to an output file
     output_path = os.path.join(output_dir, f"{output_file}.out")
-    gaf_filtered.to_csv(output_path, sep="\t", header=True, index=False)
+    gaf_filtered.write_csv(output_path, separator="\t")
 
     if verbose:
         print(f"Processed file saved to {output_path}")
@@ -83,4 +80,4 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     # Process the GAF file and generate the output
-    process_gaf(args.input_file, args.output_dir, args.output_file, args.verbose)
\ No newline at end of file
+    process_gaf(args.gaf_file, args.go_file, args.output_dir, args.output_file, args.verbose)
\ No newline at end of file
@@ -11,6 +11,36 @@ filterwarnings("ignore", category=UserWarning)
 
 from utils.genes_annotations import*
 
+# Protein records causing errors in SANSPANZ
+SKIPPED_PROTEINS = (b'ENSCAFP00845004848.1', b'ENSCAFP00845004853.1')
+
+
+def fasta_records(input_file, block_size=8 << 20):
+    """
+    Yields the raw records of a FASTA file, header line included, as bytes.
+    The file is read in blocks and split on "\\n>" so no per-line Python work is done.
+    Args:
+        input_file (str): Path to the FASTA file.
+        block_size (int, optional): Number of bytes read per block. Defaults to 8 MB.
+    Yields:
+        bytes: One newline-terminated record.
+    """
+
+    tail = b""
+    with open(input_file, "rb") as f, \
+            tqdm(total=os.path.getsize(input_file), unit="B", unit_scale=True) as progress:
+        while block := f.read(block_size):
+            progress.update(len(block))
+            buf = tail + block
+            start = 0
+            while (i := buf.find(b"\n>", start)) != -1:
+                yield buf[start:i + 1]
+                start = i + 1
+            tail = buf[start:]
+
+    if tail.strip():
+        yield tail if tail.endswith(b"\n") else tail + b"\n"
+
 
 def select_chromosome_chunks(input_file, output_dir, chr_id, chunk_size=800):
     """
@@ -43,36 +73,27 @@ def select_chromosome_chunks(input_file, output_dir, chr_id, chunk_size=800):
 
     gene_count = 0
     file_count = 0
-    chunk = []
+    chunk = bytearray()
+    input_name = os.path.basename(input_file)
 
     def save_chunk(chunk_data, file_idx):
-        output_path = os.path.join(output_dir,\
-                                   f"chunk{file_idx}_chr{chr_id}_" + input_file.split("/")[-1])
-        with open(output_path, "w") as f:
-            for line in chunk_data:
-                f.write(line + "\n")
-
-    with open(input_file, "r") as f:
-        keep = False
-        for line in tqdm(f):
-            # Causing errors
-            if 'ENSCAFP00845004848.1' in line or 'ENSCAFP00845004853.1' in line:
-                continue
-            elif line.startswith(">") and not f"ROS_Cfam_1.0:{int(chr_id)}:" in line:
-                keep = False
-            # Gene from chr of interest
-            elif line.startswith(">") and f"ROS_Cfam_1.0:{int(chr_id)}:" in line:
-                # New gene starts — flush to chunk if needed
-                if gene_count > 0 and gene_count % chunk_size == 0:
-                    save_chunk(chunk, file_count)
-                    file_count += 1
-                    chunk = []
-
-                keep = True
-                gene_count += 1
-                chunk.append(line.strip())
-            elif keep and not line.startswith(">"):
-                chunk.append(line.strip())
+        output_path = os.path.join(output_dir, f"chunk{file_idx}_chr{chr_id}_{input_name}")
+        with open(output_path, "wb") as f:
+            f.write(chunk_data)
+
+    token = f"ROS_Cfam_1.0:{int(chr_id)}:".encode()
+    for record in fasta_records(input_file):
+        header = record[:record.find(b"\n")]
+        # Gene from chr of interest
+        if token in header and not any(skip in header for skip in SKIPPED_PROTEINS):
+            # New gene starts — flush to chunk if needed
+            if gene_count > 0 and gene_count % chunk_size == 0:
+                save_chunk(chunk, file_count)
+                file_count += 1
+                chunk = bytearray()
+
+            gene_count += 1
+            chunk += record
 
     # Save remaining chunk
     if chunk:
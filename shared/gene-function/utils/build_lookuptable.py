@@ -1,118 +1,227 @@
-from Bio import SeqIO
-from Bio.Seq import Seq
-from Bio.SeqRecord import SeqRecord
-from Bio.SeqUtils import gc_fraction
-from BCBio import GFF
+import json
+import mmap
 import re
 import os
+from urllib.parse import unquote
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import pandas as pd
-import numpy as np
 from unipressed import IdMappingClient
 import time
 
-def gene_dict(dna_file,gff_file,protein_file=None, Uniport = False):
-    genome_dict = {'Gene_name':[],
-                   'Ensemble_id':[],
-                   "Locus":[]} 
+# Ensembl peptide headers carry "gene:<stable id>.<version>"
+PROTEIN_GENE_PATTERN = re.compile(r"gene:([^.\s]+)")
 
-    # Load genome records (required by GFF.parse)
-    genome_records = SeqIO.to_dict(SeqIO.parse(dna_file, "fasta"))
+# GFF3 column-9 attributes read for each gene
+NAME_PATTERN = re.compile(r"(?:^|;)Name=([^;]*)")
+GENE_ID_PATTERN = re.compile(r"(?:^|;)gene_id=([^;]*)")
+GFF_STRANDS = {"+": 1, "-": -1}
 
-    # Clean up chromosome names (optional)
-    cleaned_records = {}
-    
-    for key, record in genome_records.items():
-        desc = record.name
-        match = re.search(r'NC_(\w+)', desc)
-        if match:
-            chr_label = re.search(r'chromosome (\w+)', record.description).group(1)
-            cleaned_records[chr_label] = record  # e.g., 'chr1', 'chrX'
-        else:
-            # Scaffold or unplaced: ignore
+# Gene names per UniProt ID-mapping job
+UNIPROT_CHUNK_SIZE = 5000
+
+GENE_COLUMNS = ['Gene_name', 'Ensemble_id', 'Chromosome', 'Start', 'End', 'Strand']
+
+def _fasta_headers(fasta_file):
+    """Yield FASTA header lines (without '>') straight from a memory map.
+
+    Headers are located with mmap.find, so the sequence bytes are never decoded or
+    copied into Python strings.
+    """
+    if os.path.getsize(fasta_file) == 0:
+        return
+    with open(fasta_file, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0 if mm[:1] == b">" else mm.find(b"\n>") + 1
+        while start > 0 or mm[:1] == b">":
+            end = mm.find(b"\n", start)
+            if end == -1:
+                end = len(mm)
+            yield mm[start + 1:end].decode().rstrip("\r")
+            next_header = mm.find(b"\n>", end)
+            if next_header == -1:
+                break
+            start = next_header + 1
+
+def chromosome_labels(dna_file):
+    """Return the chromosome labels ('1', 'X', ...) of the NC_ records in a genome FASTA.
+
+    Only header lines are inspected, so the multi-GB sequence data is never held in memory.
+    Scaffolds and unplaced contigs are ignored.
+    """
+    labels = set()
+    for title in _fasta_headers(dna_file):
+        if re.search(r'NC_(\w+)', title.split(None, 1)[0]):
+            match = re.search(r'chromosome (\w+)', title)
+            if match:
+                labels.add(match.group(1))
+    return labels
+
+def _gff_index(gff_file):
+    """Byte ranges (seqid, start, end) of each contiguous run of a seqid's GFF lines.
+
+    The ranges are found in one pass and saved next to the GFF as <gff>.gffi (JSON),
+    which later calls reuse for as long as the GFF's size and mtime are unchanged.
+    """
+    index_file = f"{gff_file}.gffi"
+    stat = os.stat(gff_file)
+    source = [stat.st_size, stat.st_mtime_ns]
+    try:
+        with open(index_file) as handle:
+            saved = json.load(handle)
+        if saved["source"] == source:
+            return [tuple(run) for run in saved["runs"]]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    runs = []
+    current, start, offset = None, 0, 0
+    current_prefix = None  # b"<current seqid>\t"
+    with open(gff_file, "rb") as handle:
+        for line in handle:
+            # Lines continuing the current run only need a prefix check, not a split
+            if current_prefix is not None and line.startswith(current_prefix):
+                offset += len(line)
+                continue
+            if not line.startswith(b"#"):
+                field = line.split(b"\t", 1)[0]
+                seqid = field.decode()
+                if seqid != current:
+                    if current is not None:
+                        runs.append((current, start, offset))
+                    current, start = seqid, offset
+                current_prefix = field + b"\t"
+            offset += len(line)
+    if current is not None:
+        runs.append((current, start, offset))
+
+    try:
+        with open(index_file, "w") as handle:
+            json.dump({"source": source, "runs": runs}, handle)
+    except OSError:
+        pass  # read-only location; the index is simply rebuilt next time
+    return runs
+
+def _gff_chunks(gff_file, chromosomes):
+    """Byte ranges (chrom, start, end) of each contiguous run of a chromosome's GFF lines."""
+    return [run for run in _gff_index(gff_file) if run[0] in chromosomes]
+
+def _attribute(pattern, attributes):
+    """First value of a GFF3 column-9 attribute, or "" when absent."""
+    match = pattern.search(attributes)
+    return unquote(match.group(1).split(",")[0]) if match else ""
+
+def _parse_gff_chunk(gff_file, byte_start, byte_end, feature_type):
+    # Plain line parsing: only a handful of columns of the wanted feature type are
+    # used, so no SeqFeature objects are built for the rest of the file
+    with open(gff_file, "rb") as handle:
+        handle.seek(byte_start)
+        data = handle.read(byte_end - byte_start)
+
+    # Lines are located with bytes.find on "\t<type>\t", so only candidate lines are
+    # decoded and split; all other lines are skipped without a Python-level step
+    needle = f"\t{feature_type}\t".encode()
+    rows = []
+    hit = data.find(needle)
+    while hit != -1:
+        line_start = data.rfind(b"\n", 0, hit) + 1
+        line_end = data.find(b"\n", hit)
+        if line_end == -1:
+            line_end = len(data)
+        hit = data.find(needle, line_end)
+        line = data[line_start:line_end].decode().rstrip("\r")
+        if line.startswith("#"):
             continue
+        cols = line.split("\t")
+        if len(cols) < 9 or cols[2] != feature_type:
+            continue
+        gene_name = _attribute(NAME_PATTERN, cols[8])
+        if not gene_name:  # only store if gene name exists
+            continue
+        gene_id = _attribute(GENE_ID_PATTERN, cols[8])
+        # GFF is 1-based inclusive; keep the 0-based start Biopython locations used
+        start, end, strand = int(cols[3]) - 1, int(cols[4]), GFF_STRANDS.get(cols[6])
+        rows.append((gene_name, gene_id, cols[0], start, end, strand))
+    return rows
+
+def gff_gene_rows(gff_file, chromosomes, feature_type):
+    """Yield (name, id, chrom, start, end, strand) rows for one feature type.
+
+    Chromosomes are independent, so each one is parsed in its own process; rows come
+    back in file order, one chromosome's rows at a time rather than as one joined list.
+    """
+    chunks = _gff_chunks(gff_file, chromosomes)
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(
+            _parse_gff_chunk,
+            repeat(gff_file),
+            [start for _, start, _ in chunks],
+            [end for _, _, end in chunks],
+            repeat(feature_type),
+        )
+        for chunk_rows in results:
+            yield from chunk_rows
+
+def _gene_frame(rows):
+    # Build the table in one go (rows may be a generator); the locus is kept as typed
+    # columns rather than a joined string
+    df = pd.DataFrame.from_records(rows, columns=GENE_COLUMNS)
+    df['Chromosome'] = df['Chromosome'].astype('category')
+    df['Strand'] = df['Strand'].astype('Int8')
+    return df
+
+def uniprot_ids(gene_names, chunk_size=UNIPROT_CHUNK_SIZE):
+    """Map gene names to their first UniProtKB accession ("Not Found" when unmapped).
+
+    Names are submitted as a few large ID-mapping jobs that UniProt runs concurrently,
+    then each job is polled with exponential backoff.
+    """
+    names = sorted(set(gene_names))
+    requests = [
+        IdMappingClient.submit(source="GeneCards", dest="UniProtKB", ids=names[i:i + chunk_size])
+        for i in range(0, len(names), chunk_size)
+    ]
+
+    mapping = {}
+    for request in requests:
+        delay = 1
+        while request.get_status() in ("NEW", "RUNNING"):
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+        for row in request.each_result():
+            mapping.setdefault(row["from"], row["to"])
+    return [mapping.get(name, "Not Found") for name in gene_names]
 
-    # Parse GFF and extract mapping
-    with open(gff_file) as gff_handle:
-        for rec in GFF.parse(gff_handle, base_dict=cleaned_records):
-            for feature in rec.features:
-                if feature.type == "gene":
-                    gene_name = feature.qualifiers.get("Name", [""])[0]
-                    gene_id = feature.qualifiers.get("gene_id", [""])[0]
-                    start, end, strand = feature.location.start, feature.location.end, feature.location.strand
-                    chrom = re.search(r'chromosome (\w+)', rec.description).group(1)
-                    
-                    if gene_name:  # only store if gene name exists
-                        genome_dict['Gene_name'].append(gene_name)
-                        genome_dict['Ensemble_id'].append(gene_id)
-                        genome_dict['Locus'].append([f'{chrom}:{start}:{end}:{strand}'])
+def gene_dict(dna_file,gff_file,protein_file=None, Uniport = False):
+    # Only chromosome labels are needed from the genome, not the sequences
+    chromosomes = chromosome_labels(dna_file)
+
+    # Parse GFF and extract mapping, one chromosome per worker process
+    rows = gff_gene_rows(gff_file, chromosomes, "gene")
+    genome_df = _gene_frame(rows)
                         
     if protein_file:
-        protein_ensembl_ids = [" "] * len(genome_dict['Ensemble_id'])
-        for record in SeqIO.parse(protein_file, "fasta"):
-            protein_gene_id = record.description.split(" ")[3].split(":")[1].split(".")[0]
-            protein_id = record.id
-            
-            if protein_gene_id in genome_dict['Ensemble_id']:
-                index = genome_dict['Ensemble_id'].index(protein_gene_id)
-                protein_ensembl_ids[index] = protein_id
-                
-        genome_dict['Protein_ensembl_id'] = protein_ensembl_ids
+        # Gene stable ID -> peptide ID from the FASTA headers alone, then one vectorized
+        # map onto the gene table; a later peptide of the same gene replaces an earlier one
+        protein_by_gene = {}
+        for title in _fasta_headers(protein_file):
+            match = PROTEIN_GENE_PATTERN.search(title)
+            if match:
+                protein_by_gene[match.group(1)] = title.split(None, 1)[0]
+        genome_df['Protein_ensembl_id'] = genome_df['Ensemble_id'].map(protein_by_gene).fillna(" ")
         
-    if Uniport: # Not recommended to use this option, very slow
-        Uniprot_ids = [" "] * len(genome_dict['Gene_name'])
-        for gene in genome_dict['Gene_name']:
-            request = IdMappingClient.submit(
-            source="GeneCards", dest="UniProtKB", ids=[gene]
-            )
-            time.sleep(0.5)
-            result = pd.DataFrame(list(request.each_result()))
-        
-            idx = genome_dict['Gene_name'].index(gene)
-            if not result.empty:
-                Uniprot_ids[idx] = result['to'][0]
-            else:
-                Uniprot_ids[idx] = "Not Found"
-        genome_dict['Uniprot_id'] = Uniprot_ids
+    if Uniport:
+        genome_df['Uniprot_id'] = uniprot_ids(genome_df['Gene_name'])
                         
-    return pd.DataFrame(genome_dict)
+    return genome_df
 
 def ncRNA_dict(dna_file,gff_file):
-    genome_dict = {'Gene_name':[],
-                   'Ensemble_id':[],
-                   "Locus":[]} 
-
-    # Load genome records (required by GFF.parse)
-    genome_records = SeqIO.to_dict(SeqIO.parse(dna_file, "fasta"))
-
-    # Clean up chromosome names (optional)
-    cleaned_records = {}
-    
-    for key, record in genome_records.items():
-        desc = record.name
-        match = re.search(r'NC_(\w+)', desc)
-        if match:
-            chr_label = re.search(r'chromosome (\w+)', record.description).group(1)
-            cleaned_records[chr_label] = record  # e.g., 'chr1', 'chrX'
-        else:
-            # Scaffold or unplaced: ignore
-            continue
+    # Only chromosome labels are needed from the genome, not the sequences
+    chromosomes = chromosome_labels(dna_file)
 
-    # Parse GFF and extract mapping
-    with open(gff_file) as gff_handle:
-        for rec in GFF.parse(gff_handle, base_dict=cleaned_records):
-            for feature in rec.features:
-                if feature.type == "ncRNA_gene":
-                    gene_name = feature.qualifiers.get("Name", [""])[0]
-                    gene_id = feature.qualifiers.get("gene_id", [""])[0]
-                    start, end, strand = feature.location.start, feature.location.end, feature.location.strand
-                    chrom = re.search(r'chromosome (\w+)', rec.description).group(1)
-                    
-                    if gene_name:  # only store if gene name exists
-                        genome_dict['Gene_name'].append(gene_name)
-                        genome_dict['Ensemble_id'].append(gene_id)
-                        genome_dict['Locus'].append(f'{chrom}:{start}:{end}:{strand}')
+    # Parse GFF and extract mapping, one chromosome per worker process
+    rows = gff_gene_rows(gff_file, chromosomes, "ncRNA_gene")
                         
-    return pd.DataFrame(genome_dict)
+    return _gene_frame(rows)
 
 if __name__ == "__main__":
 
@@ -1,8 +1,14 @@
 import os
 import pandas as pd
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
+ARGOT_TYPES = {
+    'CC_ARGOT': 'cellular_component',
+    'BP_ARGOT': 'biological_process',
+    'MF_ARGOT': 'molecular_function',
+}
 
 
 
@@ -21,7 +27,7 @@ def filter_genes_annotations(chunk_files, output_file, threshold=0.6):
         - The 'type' column is filtered to include only 'CC_ARGOT', 'BP_ARGOT', and 'MF_ARGOT', which are mapped to 
           'cellular_component', 'biological_process', and 'molecular_function', respectively.
         - Gene location information (chromosome, start, end) is extracted from the 'desc' column for rows where 
-          'type' is 'original_DE'.
+          'type' is 'original_DE'; genes whose location cannot be parsed are dropped.
         - The 'PPV' column is converted to float and filtered based on the specified threshold.
         - The 'id' column is prefixed with 'GO:'.
         - The final output includes the following columns: 'gene_id', 'type', 'PPV', 'id', 'chromosome', 'start', 
@@ -29,33 +35,39 @@ def filter_genes_annotations(chunk_files, output_file, threshold=0.6):
     """
 
 
-    processed_files = []
-    for input_file in chunk_files:
-        df = pd.read_csv(input_file, sep="\t")
-
-        # Extract gene location from file
-        df_metadata = df[df['type'] == 'original_DE']
-        df_metadata[['chromosome', 'start', 'end']] = (
-            df_metadata['desc']
-            .str.split(":", expand=True)
-            .iloc[:, 2:5])
-
-        # Add gene location to the main dataframe
-        df = df.merge(df_metadata[['qpid', 'chromosome', 'start', 'end']], on='qpid')
-        df = df[df['type'].isin(['CC_ARGOT', 'BP_ARGOT', 'MF_ARGOT'])]
-        df['type'] = df['type'].map({
-            'CC_ARGOT': 'cellular_component',
-            'BP_ARGOT': 'biological_process',
-            'MF_ARGOT': 'molecular_function',
-        })
-        df['PPV'] = df['PPV'].astype(float)
-        df = df[df['PPV'] >= threshold]
-        df['id'] = df['id'].apply(lambda x: 'GO:' + str(x))
-
-        # Final formatting
-        processed_files.append(df[['qpid', 'type', 'PPV', 'id', 'chromosome', 'start', 'end', 'desc']].rename(columns={'qpid': 'gene_id'}))
-
-    pd.concat(processed_files).to_csv(output_file, sep="\t", index=False)
+    df = pd.concat(
+        [pd.read_csv(input_file, sep="\t", usecols=['type', 'desc', 'qpid', 'PPV', 'id'],
+                     dtype={'type': 'category', 'qpid': 'category', 'id': str})
+         for input_file in chunk_files],
+        ignore_index=True)
+    # Categories differ between files, so concat falls back to object: re-categorize once
+    df = df.astype({'type': 'category', 'qpid': 'category'})
+
+    # Extract gene location from the original_DE rows
+    df_metadata = df[df['type'] == 'original_DE']
+    location = (
+        df_metadata['desc']
+        .str.split(":", n=5, expand=True)
+        # reindex rather than iloc: columns missing when every desc is short become NaN
+        .reindex(columns=range(2, 5))
+        .set_axis(['chromosome', 'start', 'end'], axis=1)
+        .set_axis(df_metadata['qpid'], axis=0))
+    # A desc with too few ':' fields or non-numeric coordinates has no usable location;
+    # those genes are dropped instead of failing the whole step
+    location['start'] = pd.to_numeric(location['start'], errors='coerce')
+    location['end'] = pd.to_numeric(location['end'], errors='coerce')
+    location = location.dropna().astype({'chromosome': 'category', 'start': 'int32', 'end': 'int32'})
+
+    # Add gene location to the GO annotations
+    df = df[df['type'].isin(list(ARGOT_TYPES))].join(location, on='qpid', how='inner')
+    df['type'] = df['type'].cat.remove_unused_categories().cat.rename_categories(ARGOT_TYPES)
+    df['PPV'] = df['PPV'].astype(float)
+    df = df[df['PPV'] >= threshold]
+    df['id'] = 'GO:' + df['id']
+
+    # Final formatting
+    df = df[['qpid', 'type', 'PPV', 'id', 'chromosome', 'start', 'end', 'desc']].rename(columns={'qpid': 'gene_id'})
+    df.to_csv(output_file, sep="\t", index=False)
     print("Annotation file saved to ", output_file)
 
     
@@ -74,12 +86,11 @@ def compute_genes_functions(input_files, output_dir, output_file, specie=None):
         None
     Side Effects:
         - Creates the specified output directory if it does not exist.
-        - Executes the SANSPANZ tool for each input file.
+        - Executes the SANSPANZ tool for each input file, one process per CPU core at a time.
         - Saves intermediate and filtered output files in the specified output directory.
-    Raises:
-        subprocess.CalledProcessError: If the SANSPANZ tool execution fails for any input file.
+        - Prints an error for each input file SANSPANZ fails on; the remaining files are still processed.
     Notes:
-        - The SANSPANZ tool is invoked via a subprocess call.
+        - The SANSPANZ tool is invoked via a subprocess call, without a shell; the input file is passed on stdin.
         - The function assumes the presence of the SANSPANZ.3/runsanspanz.py script in the working directory.
         - The function filters the resulting annotations using the `filter_genes_annotations` function.
     """
@@ -88,24 +99,39 @@ def compute_genes_functions(input_files, output_dir, output_file, specie=None):
     intermediate_dir = os.path.join(output_dir, "interm")
     os.makedirs(output_dir, exist_ok=True)
     os.makedirs(intermediate_dir, exist_ok=True)
-    chunks_files = []
 
-    for file in tqdm(input_files):
-        file_id = file.split("/")[-1].split("_")[0]
+    def run_sanspanz(file):
+        # The whole file name: chunk files can share their prefix before the first "_"
+        file_id = os.path.splitext(os.path.basename(file))[0]
+        chunk_output = f"{intermediate_dir}/{file_id}_{output_file}.out"
         command = [
             "python", "SANSPANZ.3/runsanspanz.py",
             "-R",
-            "-o", f'",,,{intermediate_dir}/{file_id}_{output_file}.out"',
-            f'-s "{specie}"' if specie else "",
-            "<", file
+            "-o", f",,,{chunk_output}",
         ]
-
-        try : 
-            subprocess.run(" ".join(command), shell=True, check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"Error processing file {file}: {e}")
-            return 
-        chunks_files.append(f"{intermediate_dir}/{file_id}_{output_file}.out")
+        if specie:
+            command += ["-s", specie]
+
+        with open(file, "rb") as stdin:
+            subprocess.run(command, stdin=stdin, check=True)
+        return chunk_output
+
+    # SANSPANZ runs as an external process, so threads are enough to keep every core busy
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {executor.submit(run_sanspanz, file): file for file in input_files}
+        succeeded = set()
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            try :
+                future.result()
+                succeeded.add(future)
+            except subprocess.CalledProcessError as e:
+                print(f"Error processing file {futures[future]}: {e}")
+
+    # In input order, so the filtered output's row order doesn't depend on which run finished first
+    chunks_files = [future.result() for future in futures if future in succeeded]
+
+    if not chunks_files:
+        return
 
     filter_genes_annotations(chunks_files,\
                             f"{output_dir}/{output_file}_filtered.out")
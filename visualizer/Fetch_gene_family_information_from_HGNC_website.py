@@ -2,7 +2,6 @@
 
 import requests
 import pandas as pd
-import time
 
 # Step 1: Get HGNC family members for HLA
 HGNC_FAMILY_NAME = "HLA"  # Search term
@@ -24,28 +23,39 @@ gene_symbols = [gene['symbol'] for gene in results]
 print(f"Found {len(gene_symbols)} genes in the HLA family.")
 
 # Step 3: Query Ensembl for gene coordinates
-ensembl_url = "https://rest.ensembl.org/lookup/symbol/homo_sapiens/{}?content-type=application/json"
-gene_locations = []
-
-for symbol in gene_symbols:
+# The POST form of /lookup/symbol resolves up to 1000 symbols in one round-trip
+ensembl_url = "https://rest.ensembl.org/lookup/symbol/homo_sapiens"
+ensembl_headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+ENSEMBL_BATCH_SIZE = 1000
+found_genes = []  # (symbol, Ensembl lookup record)
+
+for i in range(0, len(gene_symbols), ENSEMBL_BATCH_SIZE):
+    batch = gene_symbols[i:i + ENSEMBL_BATCH_SIZE]
+    batch_label = f"symbols {i + 1}-{i + len(batch)} ({batch[0]}..{batch[-1]})"
     try:
-        response = requests.get(ensembl_url.format(symbol))
-        if response.status_code == 200:
-            data = response.json()
-            gene_locations.append({
-                "Gene": symbol,
-                "Chromosome": data.get("seq_region_name"),
-                "Start": data.get("start"),
-                "End": data.get("end"),
-                "Strand": data.get("strand")
-            })
-        else:
-            print(f"Failed to fetch Ensembl data for {symbol} (status {response.status_code})")
+        response = requests.post(ensembl_url, headers=ensembl_headers, json={"symbols": batch})
+        if response.status_code != 200:
+            print(f"Failed to fetch Ensembl data for {batch_label} (status {response.status_code})")
+            continue
+        found = response.json()
     except Exception as e:
-        print(f"Error fetching {symbol}: {e}")
-    time.sleep(0.2)
+        print(f"Error fetching {batch_label}: {e}")
+        continue
+
+    for symbol in batch:
+        data = found.get(symbol)
+        if not data:
+            print(f"Failed to fetch Ensembl data for {symbol} (not found)")
+            continue
+        found_genes.append((symbol, data))
 
 # Save results
-df = pd.DataFrame(gene_locations)
+df = pd.DataFrame({
+    "Gene": [symbol for symbol, _ in found_genes],
+    "Chromosome": [data.get("seq_region_name") for _, data in found_genes],
+    "Start": [data.get("start") for _, data in found_genes],
+    "End": [data.get("end") for _, data in found_genes],
+    "Strand": [data.get("strand") for _, data in found_genes],
+})
 df.to_csv("hla_gene_coordinates_full_auto.csv", index=False)
 print("✅ Done! Saved to hla_gene_coordinates_full_auto.csv")
@@ -268,17 +268,22 @@ function GenomeBrowser({ genes }) {
 
   // Add optimized lookup maps at the top of the component
   const geneIndexMap = useRef(new Map());
+  // Longest gene span, bounding how far before a region an overlapping gene can start
+  const maxGeneLength = useRef(0);
 
   // Populate the lookup map when genes change
   useEffect(() => {
     // Create indices map for faster lookups
     const newMap = new Map();
+    let maxLength = 0;
     if (genes && genes.length) {
       genes.forEach((gene, index) => {
         newMap.set(gene.id, index);
+        maxLength = Math.max(maxLength, gene.end - gene.start);
       });
     }
     geneIndexMap.current = newMap;
+    maxGeneLength.current = maxLength;
   }, [genes]);
 
   // Add a function to efficiently filter visible genes based on current zoom
@@ -288,8 +293,23 @@ function GenomeBrowser({ genes }) {
     const visibleStart = Math.max(0, start - bufferAmount);
     const visibleEnd = end + bufferAmount;
 
+    // Genes come from the API sorted by start, so only the slice starting between
+    // (visibleStart - longest gene) and visibleEnd can overlap; find it by binary search
+    const firstStartingAtOrAfter = (position) => {
+      let lo = 0;
+      let hi = genes.length;
+      while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (genes[mid].start < position) lo = mid + 1;
+        else hi = mid;
+      }
+      return lo;
+    };
+    const from = firstStartingAtOrAfter(visibleStart - maxGeneLength.current);
+    const to = firstStartingAtOrAfter(Math.floor(visibleEnd) + 1);
+
     // Filter genes that are visible in the current zoom region (with buffer)
-    return genes.filter(gene =>
+    return genes.slice(from, to).filter(gene =>
       (gene.start <= visibleEnd && gene.end >= visibleStart)
     );
   });
@@ -2,29 +2,65 @@
 fuzzy.py - Simple fuzzy matching for autocomplete (subsequence and Levenshtein distance)
 """
 
+try:
+    from rapidfuzz import process
+    from rapidfuzz.distance import Levenshtein
+except ImportError:  # optional "fast" extra; the pure-Python matcher below is used instead
+    process = None
 
-def levenshtein(s1, s2):
-    """Compute Levenshtein distance between two strings."""
+
+def levenshtein(s1, s2, max_k=None):
+    """
+    Compute Levenshtein distance between two strings.
+
+    Uses Myers' bit-parallel algorithm: the DP column for s2 is packed into
+    the bits of a Python int, so each character of s1 costs a handful of
+    integer operations instead of a loop over s2.
+
+    If max_k is given, returns max_k + 1 as soon as the distance is known
+    to exceed it.
+    """
     if len(s1) < len(s2):
-        return levenshtein(s2, s1)
+        s1, s2 = s2, s1
+    if max_k is None:
+        max_k = len(s1)
+    elif len(s1) - len(s2) > max_k:
+        return max_k + 1
     if len(s2) == 0:
         return len(s1)
-    previous_row = range(len(s2) + 1)
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
-    return previous_row[-1]
-
-
-def fuzzy_score(query, candidate):
-    """Return a score (higher is better) for how well candidate matches query."""
-    query = query.lower()
-    candidate = candidate.lower()
+    m = len(s2)
+    # Bitmask of the positions of each character in s2
+    peq = {}
+    for i, c in enumerate(s2):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    vp, vn = mask, 0
+    score = m
+    remaining = len(s1)
+    for c in s1:
+        remaining -= 1
+        eq = peq.get(c, 0)
+        xv = eq | vn
+        xh = ((((eq & vp) + vp) & mask) ^ vp) | eq
+        hp = vn | (~(xh | vp) & mask)
+        hn = vp & xh
+        if hp & last:
+            score += 1
+        elif hn & last:
+            score -= 1
+        hp = ((hp << 1) | 1) & mask
+        hn = (hn << 1) & mask
+        vp = hn | (~(xv | hp) & mask)
+        vn = hp & xv
+        # Each remaining character can lower the distance by at most one
+        if score - remaining > max_k:
+            return max_k + 1
+    return score
+
+
+def _lower_score(query, candidate, min_score=0):
+    """fuzzy_score for a query and candidate that are already lowercase."""
     # Exact match is best
     if query == candidate:
         return 100
@@ -32,20 +68,103 @@ def fuzzy_score(query, candidate):
     if query in candidate:
         return 90
     # Levenshtein distance (normalized)
-    dist = levenshtein(query, candidate)
     maxlen = max(len(query), len(candidate))
     if maxlen == 0:
         return 0
+    # Largest distance that still scores min_score
+    max_k = maxlen * (100 - min_score) // 100
+    dist = levenshtein(query, candidate, max_k)
     # Score: 100 for perfect, 0 for totally different
     return int(100 * (1 - dist / maxlen))
 
 
+def fuzzy_score(query, candidate, min_score=0):
+    """
+    Return a score (higher is better) for how well candidate matches query.
+    Scores below min_score are not computed exactly, only reported as below it.
+    """
+    return _lower_score(query.lower(), candidate.lower(), min_score)
+
+
+def _char_mask(s):
+    """Bitmask of the characters in s, folded onto 64 bits."""
+    mask = 0
+    for ch in s:
+        mask |= 1 << (ord(ch) & 63)
+    return mask
+
+
+class FuzzyIndex:
+    """
+    Candidates prepared once for repeated fuzzy_top_matches calls: lowercase
+    forms and character masks are computed here instead of on every query.
+    """
+
+    def __init__(self, candidates):
+        self.candidates = list(candidates)
+        self.lower = [cand.lower() for cand in self.candidates]
+        self.masks = [_char_mask(lower) for lower in self.lower]
+
+    @classmethod
+    def concat(cls, indexes):
+        """Join prepared indexes without recomputing their lowercase forms and masks."""
+        joined = cls([])
+        for index in indexes:
+            joined.candidates += index.candidates
+            joined.lower += index.lower
+            joined.masks += index.masks
+        return joined
+
+
 def fuzzy_top_matches(query, candidates, limit=10, min_score=60):
     """
     Return up to 'limit' candidates sorted by fuzzy_score descending.
     Only include those with score >= min_score.
+    'candidates' may be a list of strings or a FuzzyIndex built from one.
     """
-    scored = [(cand, fuzzy_score(query, cand)) for cand in candidates]
-    scored = [x for x in scored if x[1] >= min_score]
+    index = candidates if isinstance(candidates, FuzzyIndex) else FuzzyIndex(candidates)
+    query = query.lower()
+    if process is not None:
+        return _rapidfuzz_top_matches(query, index, limit, min_score)
+    query_mask = _char_mask(query)
+    scored = []
+    for cand, lower, mask in zip(index.candidates, index.lower, index.masks):
+        if query not in lower:
+            # Lower bound on the edit distance: the length difference, and one
+            # edit per query character missing from the candidate
+            maxlen = max(len(query), len(lower))
+            min_dist = max(abs(len(query) - len(lower)), (query_mask & ~mask).bit_count())
+            if int(100 * (1 - min_dist / maxlen)) < min_score:
+                continue
+        score = _lower_score(query, lower, min_score)
+        if score >= min_score:
+            scored.append((cand, score))
     scored.sort(key=lambda x: -x[1])
     return [x[0] for x in scored[:limit]]
+
+
+def _rapidfuzz_top_matches(query, index, limit, min_score):
+    """fuzzy_top_matches with the Levenshtein scoring done by rapidfuzz's C++ matcher."""
+    scores = {}
+    # Exact and substring matches keep their fixed scores
+    for i, lower in enumerate(index.lower):
+        if query in lower:
+            scores[i] = 100 if query == lower else 90
+    # The cutoff is one point loose since rapidfuzz's float similarity can round below
+    # ours; survivors are rescored with the same formula as fuzzy_score
+    for lower, _, i in process.extract_iter(
+        query,
+        index.lower,
+        scorer=Levenshtein.normalized_similarity,
+        processor=None,
+        score_cutoff=max(min_score - 1, 0) / 100,
+    ):
+        if i in scores:
+            continue
+        dist = Levenshtein.distance(query, lower)
+        score = int(100 * (1 - dist / max(len(query), len(lower))))
+        if score >= min_score:
+            scores[i] = score
+    # Ties keep candidate order, as with the pure-Python matcher
+    top = sorted(scores, key=lambda i: (-scores[i], i))[:limit]
+    return [index.candidates[i] for i in top]
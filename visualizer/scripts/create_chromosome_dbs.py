@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 import argparse
+import json
 import logging
+import os
+import re
 import sqlite3
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-import gffutils
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -16,11 +18,80 @@ logging.basicConfig(
 )
 
 
+# key=value pairs of the GFF attributes column, matched in one pass
+ATTRIBUTE_PATTERN = re.compile(r"([^=;]+)=([^;]*)")
+
+# Same layout as the gffutils "features" table the server and search routes query
+FEATURES_SCHEMA = """
+CREATE TABLE features (
+    id TEXT PRIMARY KEY,
+    seqid TEXT,
+    source TEXT,
+    featuretype TEXT,
+    start INT,
+    end INT,
+    score TEXT,
+    strand TEXT,
+    frame TEXT,
+    attributes TEXT
+)
+"""
+
+
+def parse_gff_features(input_gff_path: Path):
+    """
+    Yields one row per GFF feature, in FEATURES_SCHEMA column order.
+
+    Attributes are stored as JSON with list values (sorted), as gffutils does. The
+    feature id is the ID attribute without its "gene-" prefix, or "<featuretype>_<n>"
+    for features without one.
+    """
+    autoincrements = {}
+    with open(input_gff_path) as gff:
+        for line in gff:
+            if line.startswith("#") or not line.strip():
+                continue
+            fields = line.rstrip("\r\n").split("\t")
+            if len(fields) < 9:
+                continue
+            seqid, source, featuretype, start, end, score, strand, frame, attrs = fields[:9]
+            attributes = {
+                key.strip(): sorted(value.split(","))
+                for key, value in ATTRIBUTE_PATTERN.findall(attrs)
+            }
+            feature_id = attributes.get("ID", [None])[0]
+            if feature_id is None:
+                autoincrements[featuretype] = autoincrements.get(featuretype, 0) + 1
+                feature_id = f"{featuretype}_{autoincrements[featuretype]}"
+            elif feature_id.startswith("gene-"):
+                feature_id = feature_id[5:]
+            yield (
+                feature_id,
+                seqid,
+                source,
+                featuretype,
+                int(start),
+                int(end),
+                score,
+                strand,
+                frame,
+                json.dumps(attributes, separators=(",", ":")),
+            )
+
+
+def is_up_to_date(input_gff_path: Path, output_db_path: Path) -> bool:
+    """True if the database exists and is at least as recent as its GFF file."""
+    try:
+        return output_db_path.stat().st_mtime_ns >= input_gff_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
 def create_single_db(
     input_gff_path: Path, output_db_path: Path, force_create: bool = False
 ) -> bool:
     """
-    Creates a gffutils database for a single GFF file.
+    Creates a features database for a single GFF file.
 
     Args:
         input_gff_path (Path): Path object for the input GFF file.
@@ -28,34 +99,49 @@ def create_single_db(
         force_create (bool): If True, overwrite existing database.
 
     Returns:
-        bool: True if database creation was successful or skipped (already exists), False otherwise.
+        bool: True if database creation was successful or skipped (up to date), False otherwise.
     """
     if not input_gff_path.is_file():
         # This check might be slightly redundant if input comes from glob, but good safeguard
         logging.warning(f"Input GFF file not found: {input_gff_path}, skipping.")
         return False
 
+    if not force_create and is_up_to_date(input_gff_path, output_db_path):
+        logging.info(f"Database is up to date: {output_db_path}, skipping creation.")
+        return True
+    if output_db_path.exists():
+        output_db_path.unlink()
+
     logging.info(
         f"Creating database for: {input_gff_path.name} -> {output_db_path.name}"
     )
     start_time = time.time()
     try:
-        # Ensure paths passed to gffutils are strings
-        gffutils.create_db(
-            str(input_gff_path),
-            str(output_db_path),
-            force=force_create,
-            keep_order=True,
-            merge_strategy="merge",
-            sort_attribute_values=True,
-            disable_infer_genes=True,
-            disable_infer_transcripts=True,
-        )
-        # In the "feature" table, remove "gene-" prefix from the "id" column
+        # Bulk-load the parsed features in one unjournaled transaction, then build the
+        # index covering the server's "featuretype = 'gene' ORDER BY start" scan
         conn = sqlite3.connect(str(output_db_path))
         try:
-            conn.execute("UPDATE features SET id = replace(id, 'gene-', '')")
-            conn.commit()
+            conn.executescript(
+                """
+                PRAGMA synchronous=OFF;
+                PRAGMA journal_mode=OFF;
+                PRAGMA temp_store=MEMORY;
+                """
+                + FEATURES_SCHEMA
+            )
+            with conn:
+                # Duplicate IDs keep their first feature
+                conn.executemany(
+                    "INSERT OR IGNORE INTO features VALUES (?,?,?,?,?,?,?,?,?,?)",
+                    parse_gff_features(input_gff_path),
+                )
+            # Planner statistics are gathered once here, since the server only reads
+            conn.executescript(
+                """
+                CREATE INDEX idx_features_type_start ON features(featuretype, start);
+                ANALYZE;
+                """
+            )
         finally:
             conn.close()
         end_time = time.time()
@@ -81,7 +167,7 @@ def create_single_db(
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Create gffutils databases for chromosome-specific GFF files.",
+        description="Create SQLite feature databases for chromosome-specific GFF files.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
     parser.add_argument(
@@ -170,21 +256,30 @@ def main():
 
     total_start_time = time.time()
 
+    files_to_create = []
     for input_gff_path in sorted_files_to_process:
         db_filename = input_gff_path.with_suffix(".db").name
         output_db_path = output_dir / db_filename
 
-        if not args.force and output_db_path.exists():
+        if not args.force and is_up_to_date(input_gff_path, output_db_path):
             logging.info(
-                f"Database already exists: {output_db_path}, skipping creation."
+                f"Database is up to date: {output_db_path}, skipping creation."
             )
             skip_count += 1
             continue
+        files_to_create.append((input_gff_path, output_db_path))
 
-        if create_single_db(input_gff_path, output_db_path, args.force):
-            success_count += 1
-        else:
-            fail_count += 1
+    # Each database is built independently, so spread the files across cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = [
+            executor.submit(create_single_db, input_gff_path, output_db_path, args.force)
+            for input_gff_path, output_db_path in files_to_create
+        ]
+        for future in as_completed(futures):
+            if future.result():
+                success_count += 1
+            else:
+                fail_count += 1
 
     total_end_time = time.time()
 
@@ -192,7 +287,7 @@ def main():
     logging.info("-" * 30)
     logging.info("Processing Summary:")
     logging.info(f"  Successfully created: {success_count}")
-    logging.info(f"  Skipped (already exist): {skip_count}")
+    logging.info(f"  Skipped (up to date): {skip_count}")
     logging.info(f"  Failed: {fail_count}")
     logging.info(
         f"  Total files processed/skipped: {success_count + skip_count + fail_count}"
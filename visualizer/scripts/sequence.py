@@ -1,8 +1,107 @@
 import argparse
 import json
+import mmap
 from pathlib import Path
 
-from Bio import SeqIO
+
+def _next_header(mm, needle, start):
+    """Offset of the '>' of the next line starting with needle (which begins with a newline)."""
+    i = mm.find(needle, start)
+    return -1 if i == -1 else i + 1
+
+
+def find_sequence(mm, seq_id):
+    """
+    Returns the sequence (bytes) of the FASTA record whose ID (first word of the header) is
+    seq_id, with line breaks removed, or None if there is no such record.
+    """
+    header = b">" + seq_id.encode()
+    needle = b"\n" + header
+    at = 0 if mm[: len(header)] == header else _next_header(mm, needle, 0)
+    while at != -1:
+        # The ID must end at the header boundary, not just share a prefix
+        if mm[at + len(header) : at + len(header) + 1] in (b" ", b"\t", b"\r", b"\n", b""):
+            line_end = mm.find(b"\n", at)
+            if line_end == -1:
+                return b""
+            end = mm.find(b"\n>", line_end)
+            if end == -1:
+                end = len(mm)
+            return mm[line_end + 1 : end].translate(None, b" \t\r\n")
+        at = _next_header(mm, needle, at)
+    return None
+
+
+def read_fai(fai_path):
+    """
+    Reads a samtools faidx index into {name: (length, offset, line_bases, line_width)},
+    or returns None if there is no index file.
+    """
+    try:
+        with open(fai_path) as fai:
+            index = {}
+            for line in fai:
+                name, length, offset, line_bases, line_width = line.split("\t")[:5]
+                index[name] = (int(length), int(offset), int(line_bases), int(line_width))
+            return index
+    except FileNotFoundError:
+        return None
+
+
+def build_fai(mm):
+    """
+    Indexes the FASTA in one pass, in the same layout as read_fai. Records whose lines
+    are not all the same width (samtools faidx rejects those) are left out.
+    """
+    index = {}
+    at = 0 if mm[:1] == b">" else _next_header(mm, b"\n>", 0)
+    while at != -1:
+        line_end = mm.find(b"\n", at)
+        if line_end == -1:
+            break
+        next_at = _next_header(mm, b"\n>", line_end)
+        end = len(mm) if next_at == -1 else next_at  # includes the record's last newline
+        name = mm[at + 1 : line_end].split(None, 1)
+        offset = line_end + 1
+        first_line_end = mm.find(b"\n", offset, end)
+        if name and first_line_end != -1:
+            record = mm[offset:end]
+            line_width = first_line_end - offset + 1
+            line_bases = len(record[:line_width].rstrip(b"\r\n"))
+            length = len(record) - record.count(b"\n") - record.count(b"\r")
+            full_lines, last_line = divmod(length, line_bases) if line_bases else (0, 0)
+            expected = full_lines * line_width
+            if last_line:
+                expected += last_line + line_width - line_bases
+            # Regular: every full line ends exactly line_width bytes after the previous
+            # one, and nothing follows the last line (whose newline is optional)
+            line_ends = record[line_width - 1 : full_lines * line_width : line_width]
+            if line_ends == b"\n" * full_lines and len(record) in (
+                expected,
+                expected - (line_width - line_bases),
+            ):
+                index[name[0].decode()] = (length, offset, line_bases, line_width)
+        at = next_at
+    return index
+
+
+def write_fai(fai_path, index):
+    """Writes an index from build_fai as a samtools-compatible .fai file."""
+    with open(fai_path, "w") as fai:
+        for name, (length, offset, line_bases, line_width) in index.items():
+            fai.write(f"{name}\t{length}\t{offset}\t{line_bases}\t{line_width}\n")
+
+
+def indexed_sequence(mm, entry):
+    """Returns the sequence (bytes) at a .fai entry by slicing only that record's bytes."""
+    length, offset, line_bases, line_width = entry
+    full_lines, last_line = divmod(length, line_bases)
+    end = offset + full_lines * line_width + last_line
+    if hasattr(mmap, "MADV_SEQUENTIAL"):  # not available on Windows
+        # The record is read front to back once, so let the kernel read ahead
+        start = offset - offset % mmap.PAGESIZE
+        mm.madvise(mmap.MADV_SEQUENTIAL, start, end - start)
+    return mm[offset:end].translate(None, b" \t\r\n")
 
 
 def main(args):
@@ -10,21 +109,43 @@ def main(args):
     chromosome_data = None
     print(f"Reading FASTA file: {args.fasta}")
     try:
-        for seq_record in SeqIO.parse(args.fasta, "fasta"):
-            # print(f"Checking: {seq_record.id}") # Optional: uncomment to see progress
-            if seq_record.id == args.chromosome:
-                print(f"Found target chromosome: {args.chromosome}")
-                chromosome_data = {
-                    "name": seq_record.id,
-                    "length": len(seq_record),
-                    "sequence": str(seq_record.seq),
-                }
-                break
+        with open(args.fasta, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            # With a .fai next to the FASTA the record is sliced out directly; the
+            # index is built (and saved for later runs) on first use, and records it
+            # can't describe are found by scanning the headers instead
+            fai_path = f"{args.fasta}.fai"
+            fai = read_fai(fai_path)
+            if fai is None:
+                print(f"Indexing FASTA file: {fai_path}")
+                fai = build_fai(mm)
+                try:
+                    write_fai(fai_path, fai)
+                except OSError as e:
+                    print(f"Warning: could not save FASTA index {fai_path}: {e}")
+            if args.chromosome in fai:
+                sequence = indexed_sequence(mm, fai[args.chromosome])
+            else:
+                sequence = find_sequence(mm, args.chromosome)
+        if sequence is not None:
+            print(f"Found target chromosome: {args.chromosome}")
+            chromosome_data = {
+                "name": args.chromosome,
+                "length": len(sequence),
+                "sequence": sequence,
+            }
 
         if chromosome_data:
             Path(args.output).parent.mkdir(parents=True, exist_ok=True)
-            with open(args.output, "w") as f:
-                json.dump(chromosome_data, f, indent=2)  # Use indent for readability
+            with open(args.output, "wb") as f:
+                # Compact JSON; the sequence is plain IUPAC letters, so its bytes are
+                # written as-is, never decoded to str or run through the encoder
+                metadata = {k: v for k, v in chromosome_data.items() if k != "sequence"}
+                f.write(json.dumps(metadata, separators=(",", ":"))[:-1].encode())
+                f.write(b',"sequence":"')
+                f.write(chromosome_data["sequence"])
+                f.write(b'"}')
             print("JSON file created successfully.")
             print(f"Chromosome Length: {chromosome_data['length']}")
         else:
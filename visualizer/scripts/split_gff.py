@@ -7,6 +7,13 @@ import re
 import sys
 import time
 
+try:
+    from isal import igzip as gzip  # ISA-L decompression, from the optional "fast" extra
+except ImportError:
+    import gzip
+
+WRITE_BUFFER_SIZE = 1 << 20  # bytes buffered per chromosome before a write
+
 
 def sanitize_filename(name):
     """Removes or replaces characters problematic for filenames."""
@@ -23,24 +30,35 @@ def split_gff_by_chromosome(input_gff_path: Path, output_dir: Path, types=["all"
     Splits a GFF3 file into multiple files based on chromosome ID (column 1).
 
     Args:
-        input_gff_path (Path): Path to the input GFF3 file.
+        input_gff_path (Path): Path to the input GFF3 file (optionally gzip-compressed, ".gz").
         output_dir (Path): Path to the directory where output files will be saved.
     """
-    if not input_gff_path.exists():
+    opener = gzip.open if input_gff_path.suffix == ".gz" else open
+    # Opening the input is the existence check, rather than a separate stat first
+    try:
+        infile = opener(input_gff_path, "rb")
+    except FileNotFoundError:
         print(f"Error: Input GFF file not found: {input_gff_path}", file=sys.stderr)
         sys.exit(1)
 
     output_files = {}
+    buffers = {}  # chromosome ID -> bytes waiting to be written
     header_lines = []
     line_count = 0
     data_line_count = 0
+    keep_all = "all" in types
+    wanted_types = {t.encode() for t in types}
     start_time = time.time()
 
+    def flush(chromosome_id):
+        output_files[chromosome_id].write(buffers[chromosome_id])
+        buffers[chromosome_id] = bytearray()
+
     try:
         print(f"Processing input file: {input_gff_path}")
-        with open(input_gff_path, "r") as infile:
-            for line in infile:
-                line_count += 1
+        with infile:
+            # enumerate keeps the line number in C instead of a += per line
+            for line_count, line in enumerate(infile, 1):
                 if line_count % 100000 == 0:  # Progress indicator
                     elapsed = time.time() - start_time
                     print(
@@ -49,12 +67,12 @@ def split_gff_by_chromosome(input_gff_path: Path, output_dir: Path, types=["all"
                     )
 
                 # Store header lines
-                if line.startswith("#"):
+                if line[:1] == b"#":
                     header_lines.append(line)
                     # Also write headers immediately to any already opened files
                     # This handles cases where headers might appear mid-file (though unusual)
-                    for file_handle in output_files.values():
-                        file_handle.write(line)
+                    for buffer in buffers.values():
+                        buffer += line
                     continue  # Move to next line
 
                 # Skip empty or whitespace-only lines
@@ -62,35 +80,26 @@ def split_gff_by_chromosome(input_gff_path: Path, output_dir: Path, types=["all"
                     continue
 
                 try:
-                    # Split GFF line (tab-delimited)
-                    fields = line.split("\t")
-                    if len(fields) < 1:
-                        print(
-                            f"\nWarning: Skipping malformed line {line_count}: {line.strip()}",
-                            file=sys.stderr,
-                        )
-                        continue
-
+                    # Only the first three tab-delimited columns are needed
+                    fields = line.split(b"\t", 3)
                     chromosome_id = fields[0].strip()
-                    chromose_type = fields[2].strip()
-                    if "all" not in types and chromose_type not in types:
+                    feature_type = fields[2].strip()
+                    if not keep_all and feature_type not in wanted_types:
                         continue
 
                     data_line_count += 1
                     # Check if we already have a file open for this chromosome
                     if chromosome_id not in output_files:
-                        safe_filename = sanitize_filename(chromosome_id) + ".gff"
+                        safe_filename = sanitize_filename(chromosome_id.decode()) + ".gff"
                         output_path = output_dir / safe_filename
                         print(
-                            f"\n  Detected new chromosome '{chromosome_id}', creating file: {output_path}"
+                            f"\n  Detected new chromosome '{chromosome_id.decode()}', creating file: {output_path}"
                         )
 
                         try:
-                            # Open new file and write stored headers
-                            new_file = open(output_path, "w")
-                            for header in header_lines:
-                                new_file.write(header)
-                            output_files[chromosome_id] = new_file
+                            # Open new file and queue stored headers
+                            output_files[chromosome_id] = open(output_path, "wb")
+                            buffers[chromosome_id] = bytearray().join(header_lines)
                         except IOError as e:
                             print(
                                 f"\nError opening output file '{output_path}': {e}",
@@ -100,13 +109,15 @@ def split_gff_by_chromosome(input_gff_path: Path, output_dir: Path, types=["all"
                             # For now, let's just skip writing to this problematic file
                             continue  # Skip writing this line if file open failed
 
-                    # Write the current data line to the correct file
-                    if chromosome_id in output_files:
-                        output_files[chromosome_id].write(line)
+                    # Queue the current data line for the correct file, writing in 1 MiB blocks
+                    buffer = buffers[chromosome_id]
+                    buffer += line
+                    if len(buffer) >= WRITE_BUFFER_SIZE:
+                        flush(chromosome_id)
 
                 except IndexError:
                     print(
-                        f"\nWarning: Skipping malformed line {line_count} (not enough columns): {line.strip()}",
+                        f"\nWarning: Skipping malformed line {line_count} (not enough columns): {line.strip().decode(errors='replace')}",
                         file=sys.stderr,
                     )
                     continue
@@ -114,11 +125,14 @@ def split_gff_by_chromosome(input_gff_path: Path, output_dir: Path, types=["all"
                     Exception
                 ) as e:  # Catch other potential errors during line processing
                     print(
-                        f"\nError processing line {line_count}: {line.strip()}\n  Error: {e}",
+                        f"\nError processing line {line_count}: {line.strip().decode(errors='replace')}\n  Error: {e}",
                         file=sys.stderr,
                     )
                     continue  # Skip the problematic line
 
+        for chromosome_id in output_files:
+            flush(chromosome_id)
+
         end_time = time.time()
         print(
             f"\nFinished processing {line_count:,} total lines ({data_line_count:,} data lines)."
@@ -149,7 +163,9 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Split a GFF3 file into multiple files based on chromosome ID (column 1)."
     )
-    parser.add_argument("input_gff", type=Path, help="Path to the input GFF3 file.")
+    parser.add_argument(
+        "input_gff", type=Path, help="Path to the input GFF3 file (.gff or .gff.gz)."
+    )
     parser.add_argument(
         "-o",
         "--output-dir",
@@ -1,12 +1,16 @@
 # search_routes.py
 # Flask blueprint for gene ID and description keyword autocomplete search
 
+import hmac
+import logging
 import os
 import sqlite3
+from bisect import bisect_left
 from collections import defaultdict
+from pathlib import Path
 
-from flask import Blueprint, jsonify, request
-from fuzzy import fuzzy_top_matches
+from flask import Blueprint, abort, jsonify, request
+from fuzzy import FuzzyIndex, fuzzy_top_matches, levenshtein
 
 DB_BASE_DIR = os.path.join(
     os.path.dirname(__file__),
@@ -22,29 +26,155 @@ DB_BASE_DIR = os.path.join(
 GENE_DB_PATH = os.path.join(DB_BASE_DIR, "NC_051805.1.db")
 ANNOT_DB_PATH = os.path.join(DB_BASE_DIR, "annotations.db")
 
-search_bp = Blueprint("search", __name__)
+# Applied to every connection the server opens: the databases are only read, so
+# pages are served straight from the OS page cache through mmap
+READ_ONLY_PRAGMAS = """
+PRAGMA mmap_size=1073741824;
+PRAGMA cache_size=-131072;
+PRAGMA query_only=1;
+"""
+
+
 
-desc_keyword_index = defaultdict(set)  # keyword -> set of gene ids
+def connect_read_only(db_path, **kwargs):
+    """
+    Opens db_path read-only (mode=ro, so it can't be written or created by accident)
+    for use from any thread, with READ_ONLY_PRAGMAS applied.
+    """
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, **kwargs)
+    conn.executescript(READ_ONLY_PRAGMAS)
+    return conn
 
 
-def build_desc_keyword_index():
-    """Build in-memory reverse index: keyword -> set of gene ids."""
-    global desc_keyword_index
-    desc_keyword_index.clear()
-    conn = sqlite3.connect(ANNOT_DB_PATH)
-    cursor = conn.cursor()
+search_bp = Blueprint("search", __name__)
+
+annotations_conn = None  # shared read-only connection for description search
+desc_keyword_genes = None  # keyword -> gene names, only for DBs without the FTS index
+desc_keyword_fuzzy = FuzzyIndex([])  # keywords prepared for fuzzy matching
+gene_id_fuzzy = FuzzyIndex([])  # feature ids prepared for fuzzy matching
+gene_id_buckets = {}  # lowercase first two characters -> FuzzyIndex of those feature ids
+sorted_keywords = []  # keywords in sorted order for prefix lookups
+MAX_PREFIX_CANDIDATES = 500
+refresh_hooks = []  # callables run by refresh(), e.g. to drop pooled DB connections
+
+
+def load_desc_keywords():
+    """
+    Load the description keywords from the annotations FTS5 vocabulary.
+    Genes per keyword are looked up in the FTS index on demand (see genes_for_keyword).
+    An annotations.db built before the FTS index existed is indexed in memory instead.
+    """
+    global annotations_conn, desc_keyword_fuzzy, desc_keyword_genes, sorted_keywords
+    # Shared by request threads; SQLite serializes access to the connection
+    conn = connect_read_only(ANNOT_DB_PATH)
     try:
-        cursor.execute("SELECT Gene_name, desc FROM annotations")
-        for gene_name, desc in cursor.fetchall():
+        # fts5vocab rows come back ordered by term
+        keywords = [term for (term,) in conn.execute("SELECT term FROM annotations_terms")]
+        keyword_genes = None
+    except sqlite3.OperationalError:
+        logging.warning(
+            "%s has no annotations_terms table; rebuild it with "
+            "scripts/create_annotation_db.py to serve keyword search from FTS5",
+            ANNOT_DB_PATH,
+        )
+        keyword_genes = defaultdict(set)
+        for gene_name, desc in conn.execute("SELECT Gene_name, desc FROM annotations"):
             if desc:
                 for word in desc.lower().split():
-                    desc_keyword_index[word].add(gene_name)
+                    keyword_genes[word].add(gene_name)
+        keywords = sorted(keyword_genes)
+
+    # Swap in the new state before closing the old connection other threads may hold
+    old_conn = annotations_conn
+    annotations_conn, desc_keyword_genes = conn, keyword_genes
+    sorted_keywords = keywords
+    desc_keyword_fuzzy = FuzzyIndex(keywords)
+    if old_conn is not None:
+        old_conn.close()
+
+
+def genes_for_keyword(keyword):
+    """Genes whose annotation descriptions contain keyword, from the FTS index."""
+    if desc_keyword_genes is not None:
+        return list(desc_keyword_genes.get(keyword, ()))
+    cursor = annotations_conn.execute(
+        "SELECT DISTINCT Gene_name FROM annotations_fts WHERE annotations_fts MATCH ?",
+        ('desc:"' + keyword.replace('"', '""') + '"',),
+    )
+    return [gene_name for (gene_name,) in cursor]
+
+
+def keyword_prefix_matches(prefix):
+    """Keywords starting with prefix, found by bisecting the sorted keyword list."""
+    matches = []
+    i = bisect_left(sorted_keywords, prefix)
+    while (
+        i < len(sorted_keywords)
+        and len(matches) < MAX_PREFIX_CANDIDATES
+        and sorted_keywords[i].startswith(prefix)
+    ):
+        matches.append(sorted_keywords[i])
+        i += 1
+    return matches
+
+
+def build_gene_id_index():
+    """Load all feature ids once for gene ID autocomplete."""
+    global gene_id_fuzzy, gene_id_buckets
+    conn = connect_read_only(GENE_DB_PATH)
+    try:
+        cursor = conn.execute("SELECT id FROM features")
+        gene_id_fuzzy = FuzzyIndex(row[0] for row in cursor)
     finally:
         conn.close()
-
-
-# Build the index at import time (server startup)
-build_desc_keyword_index()
+    buckets = {}
+    for gene_id in gene_id_fuzzy.candidates:
+        buckets.setdefault(gene_id[:2].lower(), []).append(gene_id)
+    gene_id_buckets = {head: FuzzyIndex(ids) for head, ids in buckets.items()}
+
+
+def gene_id_candidates(query):
+    """
+    Feature ids whose first two characters are within one edit of the query's, so only
+    a few buckets are fuzzy-scored, plus any other id containing the query (those score
+    highest); all ids if no bucket is close.
+    """
+    query = query.lower()
+    head = query[:2]
+    close_keys = {key for key in gene_id_buckets if levenshtein(key, head) <= 1}
+    if not close_keys:
+        return gene_id_fuzzy
+    # A query from the middle of an id ("rca1" for BRCA1) falls outside the close buckets
+    substring_hits = FuzzyIndex(
+        cand
+        for cand, lower in zip(gene_id_fuzzy.candidates, gene_id_fuzzy.lower)
+        if query in lower and lower[:2] not in close_keys
+    )
+    return FuzzyIndex.concat([gene_id_buckets[key] for key in close_keys] + [substring_hits])
+
+
+# Build the indexes at import time (server startup)
+load_desc_keywords()
+build_gene_id_index()
+
+
+@search_bp.route("/api/v1/search/refresh", methods=["POST"])
+def refresh():
+    """
+    Rebuild the in-memory search indexes after the databases change.
+    Requires the server's API_KEY in the X-API-Key header.
+    """
+    # Read per request: server.py loads .env after importing this module
+    api_key = os.getenv("API_KEY")
+    sent_key = request.headers.get("X-API-Key", "")
+    if not api_key or not hmac.compare_digest(sent_key.encode(), api_key.encode()):
+        abort(403, description="A valid X-API-Key header is required.")
+    load_desc_keywords()
+    build_gene_id_index()
+    for hook in refresh_hooks:
+        hook()
+    return jsonify({"gene_ids": len(gene_id_fuzzy.candidates), "keywords": len(sorted_keywords)})
 
 
 @search_bp.route("/api/v1/search/autocomplete", methods=["GET"])
@@ -54,20 +184,14 @@ def autocomplete():
         return jsonify({"gene_ids": [], "descriptions": []})
 
     # --- Gene ID fuzzy search ---
-    try:
-        conn = sqlite3.connect(GENE_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM features", ())
-        all_gene_ids = [row[0] for row in cursor.fetchall()]
-    finally:
-        conn.close()
-    top_gene_ids = fuzzy_top_matches(query, all_gene_ids, limit=10, min_score=60)
+    top_gene_ids = fuzzy_top_matches(query, gene_id_candidates(query), limit=10, min_score=60)
 
     # --- Description keywords fuzzy search ---
-    all_keywords = list(desc_keyword_index.keys())
-    top_keywords = fuzzy_top_matches(query, all_keywords, limit=10, min_score=60)
+    # Rank prefix matches only; fall back to the whole keyword list when there are none
+    candidates = keyword_prefix_matches(query) or desc_keyword_fuzzy
+    top_keywords = fuzzy_top_matches(query, candidates, limit=10, min_score=60)
     desc_matches = [
-        {"keyword": keyword, "genes": list(desc_keyword_index[keyword])}
+        {"keyword": keyword, "genes": genes_for_keyword(keyword)}
         for keyword in top_keywords
     ]
 
@@ -80,5 +204,5 @@ def genes_by_keyword():
     if not keyword:
         return jsonify({"keyword": keyword, "gene_ids": []})
 
-    gene_ids = list(desc_keyword_index.get(keyword, []))
+    gene_ids = genes_for_keyword(keyword)
     return jsonify({"keyword": keyword, "gene_ids": gene_ids})
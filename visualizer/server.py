@@ -1,12 +1,23 @@
-import json
+import argparse
+import gzip
 import logging
 import os
 import sqlite3
+import threading
+from functools import lru_cache
 
 from dotenv import load_dotenv
-from flask import Flask, abort, jsonify, request
+from flask import Flask, Response, abort, request
 from flask_cors import CORS
-from search_routes import DB_BASE_DIR, search_bp
+from search_routes import DB_BASE_DIR, connect_read_only, refresh_hooks, search_bp
+
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:  # orjson comes with the optional "fast" extra
+    from json import dumps as _stdlib_json_dumps, loads as _json_loads
+
+    def _json_dumps(obj):
+        return _stdlib_json_dumps(obj, separators=(",", ":")).encode()
 
 # Load environment variables from .env file
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
@@ -30,6 +41,9 @@ app.register_blueprint(search_bp)
 CORS(app)  # Allow requests from other origins (like your React dev server)
 
 
+KEPT_ATTRIBUTES = ("gbkey", "gene_biotype")
+
+
 def parse_attributes(attributes_str):
     """
     Parses attributes which may be a JSON string (from NCBI GFF/JSON) or already a dict.
@@ -40,39 +54,165 @@ def parse_attributes(attributes_str):
 
     # Parse to dict
     if isinstance(attributes_str, dict):
-        attrs = attributes_str
-    else:
-        try:
-            attrs = json.loads(attributes_str)
-        except Exception:
-            attrs = {}
+        return _kept_attributes(attributes_str)
+    # Copy so callers can't modify the memoized dict
+    return dict(_decode_attributes(attributes_str))
+
+
+@lru_cache(maxsize=1024)
+def _decode_attributes(attributes_str):
+    """Decodes an attributes JSON string; identical strings are parsed once."""
+    try:
+        attrs = _json_loads(attributes_str)
+    except Exception:
+        attrs = {}
+    return _kept_attributes(attrs)
+
+
+def _kept_attributes(attrs):
+    """Only keep 'gbkey' and 'gene_biotype', flattening single-element lists to values."""
+    kept = {}
+    for key in KEPT_ATTRIBUTES:
+        value = attrs.get(key)
+        if isinstance(value, list) and len(value) == 1:
+            value = value[0]
+        if value is not None:
+            kept[key] = value
+    return kept
+
+
+def json_response(obj):
+    """Serializes obj with orjson when available, falling back to the stdlib json."""
+    return Response(_json_dumps(obj), mimetype="application/json")
+
+
+# Responses only change when their DB file is rebuilt, so clients may reuse them
+# for a while and then revalidate against the DB's ETag
+CACHE_MAX_AGE = 300  # seconds
+
+
+def db_etag(db_path):
+    """Strong ETag for responses read from a DB file: the file's modification time."""
+    return f"{os.stat(db_path).st_mtime_ns:x}"
+
+
+def with_cache_headers(response, etag):
+    """Sets the ETag and Cache-Control headers on a response."""
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    return response
+
+
+def not_modified(etag):
+    """A 304 response if the client already holds the version tagged etag, else None."""
+    if request.if_none_match.contains(etag):
+        return with_cache_headers(Response(status=304), etag)
+    return None
+
+
+# Statements are module constants so each connection's statement cache reuses them
+SQL_ALL_GENES = """SELECT id, start, end, strand,
+                          json_extract(attributes, '$.gbkey[0]') AS gbkey,
+                          json_extract(attributes, '$.gene_biotype[0]') AS gene_biotype
+                   FROM features
+                   WHERE featuretype = 'gene' ORDER BY start"""
+SQL_ONE_GENE = """SELECT id, start, end, strand, attributes
+                  FROM features
+                  WHERE id = ? AND featuretype = 'gene'"""
+SQL_MOST_PROBABLE_ANNOTATION = """SELECT * FROM annotations
+                                  WHERE Gene_name = ?
+                                  ORDER BY CAST(PPV AS REAL) DESC
+                                  LIMIT 1"""
+SQL_ALL_ANNOTATIONS = """SELECT * FROM annotations
+                         WHERE Gene_name = ?
+                         ORDER BY CAST(PPV AS REAL) DESC"""
+
+# Connections are opened once per database and shared by all requests; each is
+# stored with the (inode, mtime) of the file it was opened on
+_connections = {}
+_connections_lock = threading.Lock()
+
+
+def clear_db_connections():
+    """Drops every pooled connection so the next request reopens its DB."""
+    with _connections_lock:
+        # Not closed here: requests may still be using them, and they close once released
+        _connections.clear()
 
-    # Flatten single-element lists to values
-    for k, v in list(attrs.items()):
-        if isinstance(v, list) and len(v) == 1:
-            attrs[k] = v[0]
 
-    # Only keep 'gbkey' and 'gene_biotype'
-    return attrs
+# Rebuilt databases are picked up by POST /api/v1/search/refresh
+refresh_hooks.append(clear_db_connections)
 
 
 # Helper function to get DB connection or abort
 def get_db_connection(chromosome_id):
-    """Gets DB path and checks existence, aborts on failure."""
+    """
+    Gets the shared connection for a DB, opening it on first use and reopening it when
+    the file has been rebuilt or replaced since; aborts on failure.
+    """
     db_filename = f"{chromosome_id}.db"
     db_path = os.path.join(DB_BASE_DIR, db_filename)
 
-    if not os.path.exists(db_path):
-        logging.error(f"Database file not found: {db_path}")
-        abort(404, description=f"Database for chromosome '{chromosome_id}' not found.")
+    with _connections_lock:
+        try:
+            stat = os.stat(db_path)
+        except FileNotFoundError:
+            _connections.pop(db_path, None)
+            logging.error(f"Database file not found: {db_path}")
+            abort(404, description=f"Database for chromosome '{chromosome_id}' not found.")
+        identity = (stat.st_ino, stat.st_mtime_ns)
+
+        pooled = _connections.get(db_path)
+        if pooled is not None and pooled[1] == identity:
+            return pooled[0], db_path
 
-    try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row  # Return rows as dictionary-like objects
+        try:
+            # Requests run on different threads; SQLite serializes access to the connection
+            conn = connect_read_only(db_path, cached_statements=512)
+            conn.row_factory = sqlite3.Row  # Return rows as dictionary-like objects
+        except sqlite3.Error as e:
+            logging.error(f"SQLite error connecting to {db_path}: {e}")
+            abort(500, description="Database connection error.")
+        # A replaced connection is left to close once in-flight requests release it
+        _connections[db_path] = (conn, identity)
         return conn, db_path
-    except sqlite3.Error as e:
-        logging.error(f"SQLite error connecting to {db_path}: {e}")
-        abort(500, description="Database connection error.")
+
+
+@lru_cache(maxsize=64)
+def _build_genes_payload(chromosome_id, mtime):
+    """
+    Serialized gene list of a chromosome DB as (raw, gzip-compressed) bytes, cached
+    per DB file version (mtime).
+    """
+    conn, db_path = get_db_connection(chromosome_id)
+    # Query features table for genes matching the chromosome
+    # Only the two attributes the browser shows are projected out of the
+    # attributes JSON by SQLite, instead of parsing every row's JSON here
+    cursor = conn.cursor()
+    cursor.row_factory = None  # Plain tuples; no sqlite3.Row per gene
+
+    # Rows are consumed as SQLite steps, without an intermediate fetchall() list
+    genes = [
+        {
+            "id": feature_id,  # Include the feature ID
+            "start": start,
+            "end": end,
+            "strand": strand,
+            "attributes": {
+                key: value
+                for key, value in zip(KEPT_ATTRIBUTES, attribute_values)
+                if value is not None
+            },
+        }
+        for feature_id, start, end, strand, *attribute_values in cursor.execute(
+            SQL_ALL_GENES
+        )
+    ]
+    logging.info("Found %d genes for %s in %s", len(genes), chromosome_id, db_path)
+    payload = _json_dumps(genes)
+    # Compressed once per cache entry; the repetitive JSON shrinks several-fold
+    return payload, gzip.compress(payload, compresslevel=6, mtime=0)
 
 
 @app.route("/api/v1/genes/", methods=["GET"])
@@ -83,40 +223,29 @@ def get_all_genes_for_chromosome():
         abort(400, description="Missing 'chromosome' query parameter.")
 
     conn, db_path = get_db_connection(chromosome_id)
-    genes = []
+    mtime = os.stat(db_path).st_mtime_ns
+    use_gzip = bool(request.accept_encodings["gzip"])
+    # The gzip and identity bodies differ byte for byte, so each gets its own strong ETag
+    etag = f"{mtime:x}-gz" if use_gzip else f"{mtime:x}"
+    cached = not_modified(etag)
+    if cached:
+        cached.vary.add("Accept-Encoding")
+        return cached
     try:
-        cursor = conn.cursor()
-        # Query features table for genes matching the chromosome
-        cursor.execute(
-            """SELECT id, start, end, strand, attributes
-               FROM features
-               WHERE featuretype = 'gene' ORDER BY start"""
-        )
-
-        for row in cursor.fetchall():
-            attributes = parse_attributes(row["attributes"])
-            genes.append(
-                {
-                    "id": row["id"],  # Include the feature ID
-                    "start": row["start"],
-                    "end": row["end"],
-                    "strand": row["strand"],
-                    "attributes": attributes,
-                }
-            )
-        conn.close()
-        logging.info(f"Found {len(genes)} genes for {chromosome_id} in {db_path}")
-        return jsonify(genes)
+        # The DB file's mtime is part of the cache key, so a rebuilt DB is re-read
+        payload, gzipped = _build_genes_payload(chromosome_id, mtime)
+        response = Response(payload, mimetype="application/json")
+        if use_gzip:
+            response.set_data(gzipped)
+            response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+        return with_cache_headers(response, etag)
 
     except sqlite3.Error as e:
         logging.error(f"SQLite error querying {db_path}: {e}")
-        if conn:
-            conn.close()
         abort(500, description="Database query error.")
     except Exception as e:
         logging.error(f"An unexpected error occurred processing {db_path}: {e}")
-        if conn:
-            conn.close()
         abort(500, description="Internal server error.")
 
 
@@ -130,17 +259,14 @@ def get_specific_gene(feature_id):
         abort(400, description="Missing 'chromosome' query parameter.")
 
     conn, db_path = get_db_connection(chromosome_id)
+    etag = db_etag(db_path)
+    cached = not_modified(etag)
+    if cached:
+        return cached
     try:
-        cursor = conn.cursor()
         # Query features table for the specific feature ID
-        cursor.execute(
-            """SELECT id, start, end, strand, attributes
-               FROM features
-               WHERE id = ? AND featuretype = 'gene'""",
-            (feature_id,),
-        )
+        cursor = conn.execute(SQL_ONE_GENE, (feature_id,))
         row = cursor.fetchone()
-        conn.close()
 
         if row:
             attributes = parse_attributes(row["attributes"])
@@ -151,8 +277,8 @@ def get_specific_gene(feature_id):
                 "strand": row["strand"],
                 "attributes": attributes,
             }
-            logging.info(f"Found gene {feature_id} for {chromosome_id} in {db_path}")
-            return jsonify(gene_data)
+            logging.info("Found gene %s for %s in %s", feature_id, chromosome_id, db_path)
+            return with_cache_headers(json_response(gene_data), etag)
         else:
             logging.warning(
                 f"Gene {feature_id} not found for {chromosome_id} in {db_path}"
@@ -164,15 +290,11 @@ def get_specific_gene(feature_id):
 
     except sqlite3.Error as e:
         logging.error(f"SQLite error querying {db_path} for {feature_id}: {e}")
-        if conn:
-            conn.close()
         abort(500, description="Database query error.")
     except Exception as e:
         logging.error(
             f"An unexpected error occurred processing {db_path} for {feature_id}: {e}"
         )
-        if conn:
-            conn.close()
         abort(500, description="Internal server error.")
 
 
@@ -185,23 +307,17 @@ def get_most_probable_annotation():
         logging.warning("Missing 'chromosome' or 'gene_name' query parameter.")
         abort(400, description="Missing 'chromosome' or 'gene_name' query parameter.")
     conn, db_path = get_db_connection("annotations")
+    etag = db_etag(db_path)
+    cached = not_modified(etag)
+    if cached:
+        return cached
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT * FROM annotations
-            WHERE Gene_name = ?
-            ORDER BY CAST(PPV AS FLOAT) DESC
-            LIMIT 1
-            """,
-            (gene_name,),
-        )
+        cursor = conn.execute(SQL_MOST_PROBABLE_ANNOTATION, (gene_name,))
         row = cursor.fetchone()
-        conn.close()
         if row:
-            logging.info(f"Annotation row: {row}")
-            logging.info(f"Annotation dict: {dict(row)}")
-            return jsonify(dict(row))
+            annotation = dict(row)
+            logging.info("Annotation for %s: %s", gene_name, annotation)
+            return with_cache_headers(json_response(annotation), etag)
         else:
             logging.warning(
                 f"No annotation found for gene '{gene_name}' on chromosome '{chromosome_id}'."
@@ -212,8 +328,6 @@ def get_most_probable_annotation():
             )
     except Exception as e:
         logging.error(f"Error retrieving annotation: {e}")
-        if conn:
-            conn.close()
         abort(500, description=f"Error retrieving annotation: {e}")
 
 
@@ -224,27 +338,34 @@ def get_all_annotations_for_gene():
     gene_name = request.args.get("gene_name")
     if not chromosome_id or not gene_name:
         abort(400, description="Missing 'chromosome' or 'gene_name' query parameter.")
-    conn, db_path = get_db_connection(chromosome_id)
+    conn, db_path = get_db_connection("annotations")
+    etag = db_etag(db_path)
+    cached = not_modified(etag)
+    if cached:
+        return cached
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT * FROM annotations
-            WHERE Gene_name = ?
-            ORDER BY CAST(PPV AS FLOAT) DESC
-            """,
-            (gene_name,),
-        )
+        cursor = conn.execute(SQL_ALL_ANNOTATIONS, (gene_name,))
         rows = cursor.fetchall()
-        conn.close()
-        return jsonify([dict(row) for row in rows])
+        return with_cache_headers(json_response([dict(row) for row in rows]), etag)
     except Exception as e:
-        if conn:
-            conn.close()
         abort(500, description=f"Error retrieving annotations: {e}")
 
 
+def create_app():
+    """Returns the configured app, for WSGI servers (e.g. gunicorn 'server:create_app()')."""
+    return app
+
+
 if __name__ == "__main__":
-    # Runs the Flask development server
+    parser = argparse.ArgumentParser(description="Run the visualizer API server.")
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Enable the Flask debugger and auto-reloader (development only).",
+    )
+    args = parser.parse_args()
+
+    # Runs the Flask built-in server, handling requests on threads; use a WSGI
+    # server such as gunicorn for production
     # Make sure the host is accessible if running React in a container/VM
-    app.run(debug=True, host="0.0.0.0", port=5001)
+    app.run(debug=args.debug, threaded=True, host="0.0.0.0", port=5001)